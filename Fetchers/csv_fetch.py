@@ -1,32 +1,138 @@
+# CSV league input
+# - Team stats: team_name, wins, losses, points_for and optionally ties
+# - Remaining schedule: home_team, away_team (other columns, e.g. week, are ignored)
+# - Each source can be a path, bytes or an open file (text or binary), so
+#   uploads are parsed straight from the request stream, without temp files
+# - Headers are checked and rows parsed in one streaming pass; schedule rows
+#   go straight to team indices, so large schedules never hold name pairs
+
 import csv
+import io
+import os
+from array import array
+
+from league import League
+
+TEAM_COLUMNS = ('team_name', 'wins', 'losses', 'points_for')
+SCHEDULE_COLUMNS = ('home_team', 'away_team')
+
+
+class CSVFormatError(ValueError):
+    """
+    A CSV file that can't be read as a league; the message names the file and line.
+    """
+
+    def __init__(self, source, line, message):
+        self.source = source
+        self.line = line
+        location = f"{source} line {line}" if line else source
+        super().__init__(f"{location}: {message}")
+
+
+def iter_lines(source, name):
+    """
+    Yield the text lines of a path, bytes, or a text or binary file object.
+
+    Binary input is decoded one line at a time, so a bad byte is reported on
+    its own line. File objects the caller passed in are left open.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_lines(f, name)
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    for line, text in enumerate(source, 1):
+        if isinstance(text, bytes):
+            try:
+                text = text.decode('utf-8')
+            except UnicodeDecodeError as e:
+                raise CSVFormatError(name, line, f"not UTF-8 text ({e.reason} at byte {e.start})") from None
+        if line == 1:
+            text = text.lstrip('\ufeff')
+        yield text
+
+
+def read_rows(source, name, columns, optional=()):
+    """
+    Check the header, then yield (line number, values) for every non-blank row.
+
+    values holds each of `columns` then `optional`, in order; optional columns
+    missing from the header read as ''.
+    """
+    reader = csv.reader(iter_lines(source, name))
+    try:
+        header = [field.strip() for field in next(reader, [])]
+        if not header:
+            raise CSVFormatError(name, None, "file is empty")
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise CSVFormatError(name, 1, f"missing required header: {', '.join(missing)}")
+        positions = [header.index(column) for column in columns]
+        positions += [header.index(column) if column in header else None for column in optional]
+        width = len(header)
+
+        for row in reader:
+            if not any(value.strip() for value in row):
+                continue
+            if len(row) < width:
+                row += [''] * (width - len(row))
+            yield reader.line_num, [row[i].strip() if i is not None else '' for i in positions]
+    except csv.Error as e:
+        raise CSVFormatError(name, reader.line_num, str(e)) from None
+
+
+def parse_number(value, column, convert, name, line):
+    try:
+        return convert(value)
+    except ValueError:
+        raise CSVFormatError(name, line, f"invalid {column} {value!r}") from None
+
+
+def parse_csv(team_file, schedule_file, playoff_teams=6, bye_teams=2,
+              team_name='teams file', schedule_name='schedule file'):
+    """
+    Build a League from a team stats CSV and a remaining schedule CSV.
+
+    Parameters:
+    - team_file, schedule_file: paths, bytes or open files
+    - team_name, schedule_name: what to call each file in error messages
+
+    Raises CSVFormatError naming the file and line of the first bad row.
+    """
+    index = {}
+    wins, losses, ties, points = [], [], [], []
+    for line, (team, win, loss, point, tie) in read_rows(team_file, team_name, TEAM_COLUMNS, ('ties',)):
+        if not team:
+            raise CSVFormatError(team_name, line, "missing team_name")
+        if team in index:
+            raise CSVFormatError(team_name, line, f"duplicate team {team!r}")
+        index[team] = len(index)
+        wins.append(parse_number(win, 'wins', int, team_name, line))
+        losses.append(parse_number(loss, 'losses', int, team_name, line))
+        ties.append(parse_number(tie, 'ties', int, team_name, line) if tie else 0)
+        points.append(parse_number(point, 'points_for', float, team_name, line))
+    if not index:
+        raise CSVFormatError(team_name, None, "no teams")
+
+    schedule = array('q')  # home, away, home, away, ...
+    for line, game in read_rows(schedule_file, schedule_name, SCHEDULE_COLUMNS):
+        for column, team in zip(SCHEDULE_COLUMNS, game):
+            if team not in index:
+                raise CSVFormatError(schedule_name, line, f"{column} {team!r} is not in the teams file")
+            schedule.append(index[team])
+
+    return League(list(index), wins, losses, ties, points, schedule, playoff_teams, bye_teams)
 
-def fetch_csv(team_file='Fetchers/resources/team_stats.csv', 
-              schedule_file='Fetchers/resources/remaining_schedule.csv'):
-    current_wins = {}
-    teams = []
-    remaining_schedule = []
 
+def fetch_csv(team_file='Fetchers/resources/team_stats.csv',
+              schedule_file='Fetchers/resources/remaining_schedule.csv',
+              playoff_teams=6, bye_teams=2):
+    """
+    parse_csv, returning None on failure like the other fetchers.
+    """
     try:
-        with open(team_file, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                print(f"Row: {row}")
-                
-                team_name = row['team_name']
-                wins = int(row['wins'])
-                losses = int(row['losses'])
-                ties = int(row.get('ties', 0))
-                points = float(row['points_for'])
-                teams.append(team_name)
-                current_wins[team_name] = (wins, losses, ties, points)
-        with open(schedule_file, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                home_team = row['home_team']
-                away_team = row['away_team']
-                remaining_schedule.append((home_team, away_team))
-
-        return current_wins, remaining_schedule, teams
-    except Exception as e:
+        return parse_csv(team_file, schedule_file, playoff_teams, bye_teams)
+    except (OSError, ValueError) as e:
         print(f"Error reading team file: {e}")
-        return None, None, None
\ No newline at end of file
+        return None
@@ -1,16 +1,29 @@
 from espn_api.football import League
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
 
-def fetch_week_matchups(league, week):
-    try:
-        matchups = league.scoreboard(week=week)
-        return [(m.home_team.team_name, m.away_team.team_name) for m in matchups]
-    except Exception as e:
-        print(f"Warning: Could not fetch matchups for week {week}: {e}")
-        return []
+from league import League as LeagueRecords, SeasonState
 
-def fetch_espn(league_id):
+def fetch_week_matchups(league, weeks):
+    # league.scoreboard(week) downloads the whole season schedule and keeps one
+    # week of it, so every week comes from a single schedule request instead
+    if not weeks:
+        return {}
+    data = league.espn_request.league_get(params={"view": "mMatchupScore"})
+    team_names = {team.team_id: team.team_name for team in league.teams}
+    matchups = {week: [] for week in weeks}
+    for matchup in data["schedule"]:
+        week = matchup["matchupPeriodId"]
+        # Bye weeks have no away team
+        if week in matchups and "away" in matchup:
+            matchups[week].append((team_names[matchup["home"]["teamId"]], team_names[matchup["away"]["teamId"]]))
+    return matchups
+
+def fetch_espn_season(league_id, known_weeks=()):
+    """
+    Standings and settings, plus the matchups of remaining weeks not in known_weeks.
+
+    Returns a SeasonState, or None on failure.
+    """
     try:
         year = datetime.now().year
         league = League(league_id=league_id, year=year)
@@ -23,19 +36,23 @@ def fetch_espn(league_id):
         for team in league.teams:
             teams.append(team.team_name)
             current_wins[team.team_name] = (team.wins, team.losses, team.ties, team.points_for)
-        remaining_schedule = []
         current_week = league.current_week
         reg_season_count = league.settings.reg_season_count
-        # Use scoreboard to get matchups for each remaining week
-        with ThreadPoolExecutor(max_workers=5)as executer:
-            futures = [executer.submit(fetch_week_matchups, league, week)
-                       for week in range(current_week, reg_season_count + 1)]
-            for future in futures:
-                remaining_schedule.extend(future.result())
+        weeks = [week for week in range(current_week, reg_season_count + 1) if week not in known_weeks]
+        matchups = fetch_week_matchups(league, weeks)
 
-        print(f"This is the remaining schedule: {remaining_schedule}")
-      
-        return current_wins, remaining_schedule, teams, playoff_teams, playoff_bye_weeks
+        return SeasonState(current_wins, teams, playoff_teams, playoff_bye_weeks,
+                           current_week, reg_season_count, matchups)
     except Exception as e:
         print(f"Error fetching data from ESPN API: {e}")
-        return None, None, None, None, None
\ No newline at end of file
+        return None
+
+def fetch_espn(league_id):
+    season = fetch_espn_season(league_id)
+    if season is None:
+        return None
+    try:
+        return LeagueRecords.from_season(season, season.matchups)
+    except ValueError as e:
+        print(f"Error fetching data from ESPN API: {e}")
+        return None
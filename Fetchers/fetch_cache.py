@@ -0,0 +1,48 @@
+# Cache in front of the ESPN and Sleeper fetchers
+# - Keyed by (source, league_id, season), holding the League a fetcher returns
+# - Configured from the environment:
+#   FETCH_CACHE_TTL (seconds, default 300), FETCH_CACHE_STALE_TTL (default 3600),
+#   FETCH_CACHE_SIZE (entries, default 256), FETCH_CACHE_DB (SQLite path, off by default)
+
+import os
+from datetime import datetime
+
+import metrics
+from cache import SQLiteStore, TTLCache
+from league import League
+
+
+def create_fetch_cache():
+    db_path = os.environ.get('FETCH_CACHE_DB')
+    store = SQLiteStore(db_path, table='league_fetches',
+                        encode=League.to_dict, decode=League.from_dict) if db_path else None
+    return TTLCache(max_entries=int(os.environ.get('FETCH_CACHE_SIZE', 256)),
+                    ttl=float(os.environ.get('FETCH_CACHE_TTL', 300)),
+                    stale_ttl=float(os.environ.get('FETCH_CACHE_STALE_TTL', 3600)),
+                    store=store)
+
+
+fetch_cache = create_fetch_cache()
+
+
+def cached_fetch(source, league_id, fetch_strategy):
+    """
+    Fetch a league through the cache.
+
+    Returns:
+    - the fetcher's League, or None if the fetch failed
+    - cache status: 'hit', 'stale' or 'miss'
+    """
+    season = datetime.now().year
+
+    def load():
+        with metrics.span('fetch', source=source):
+            league = fetch_strategy(league_id)
+        # Fetchers signal failure with None, which TTLCache never caches
+        if league is None:
+            metrics.increment('fetch_failures_total', source=source)
+        return league
+
+    league, status = fetch_cache.get_or_load((source, league_id, season), load)
+    metrics.increment('cache_requests_total', cache='fetch', status=status)
+    return league, status
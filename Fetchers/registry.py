@@ -0,0 +1,17 @@
+# Fetcher for each league source, keyed by the source name used in the API routes
+# - Every fetcher takes a league id and returns a League, or None on failure
+# - Season fetchers also take the weeks already known and return a SeasonState
+#   with only the other weeks' matchups, or None on failure
+
+from Fetchers.espn_fetch import fetch_espn, fetch_espn_season
+from Fetchers.sleeper_fetch import fetch_sleeper_playoff_odds_data, fetch_sleeper_season
+
+FETCHERS = {
+    'espn': fetch_espn,
+    'sleeper': fetch_sleeper_playoff_odds_data
+}
+
+SEASON_FETCHERS = {
+    'espn': fetch_espn_season,
+    'sleeper': fetch_sleeper_season
+}
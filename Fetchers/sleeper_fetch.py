@@ -1,8 +1,31 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from league import League, SeasonState
+
+SLEEPER_API_URL = "https://api.sleeper.app/v1"
+REQUEST_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+MAX_CONCURRENT_REQUESTS = 8
+
+def create_session():
+    # One pooled keep-alive session for every Sleeper call, so a league fetch
+    # pays for a single TLS handshake; transient failures are retried with backoff
+    retry = Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(['GET']))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+session = create_session()
+executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS)
 
 def fetch_request(url):
     try:
-        response = requests.get(url)
+        response = session.get(url, timeout=REQUEST_TIMEOUT)
         if response.status_code != 200:
             raise ValueError(f"Failed to fetch league data: {response.status_code}")
         return response.json()
@@ -40,10 +63,11 @@ def get_roster_to_teamname_mapping(rosters, users):
             raise ValueError(f"User with ID {user_id} not found.")
     return roster_to_teamname
 
-def get_remaining_schedule(league_url, games_played, total_weeks, roster_to_teamname):
-    remaining_schedule = []
-    for week in range(games_played + 1, total_weeks):
-        matchups = fetch_request(f"{league_url}/matchups/{week}")
+def get_week_matchups(league_url, weeks, roster_to_teamname):
+    week_matchups = {}
+    # Fetch every week at once, then walk them in order
+    weekly_matchups = list(executor.map(fetch_request, [f"{league_url}/matchups/{week}" for week in weeks]))
+    for week, matchups in zip(weeks, weekly_matchups):
         if matchups is None:
             return None
         matchup_dict = {}
@@ -54,41 +78,54 @@ def get_remaining_schedule(league_url, games_played, total_weeks, roster_to_team
             else:
                 matchup_dict[matchup["matchup_id"]].append(team_name)
 
+        week_matchups[week] = []
         for matchup_id in matchup_dict:
             teams = matchup_dict[matchup_id]
             if len(teams) == 2:
-                remaining_schedule.append((teams[0], teams[1]))
+                week_matchups[week].append((teams[0], teams[1]))
             else:
                 raise ValueError(f"Invalid matchup data for week {week}, matchup ID {matchup_id}: {teams}")
-    return remaining_schedule
+    return week_matchups
 
-def fetch_sleeper_playoff_odds_data(league_id):
-    league_url = f"https://api.sleeper.app/v1/league/{league_id}"
+def fetch_sleeper_season(league_id, known_weeks=()):
+    """
+    Standings and settings, plus the matchups of remaining weeks not in known_weeks.
+
+    Returns a SeasonState, or None on failure.
+    """
+    league_url = f"{SLEEPER_API_URL}/league/{league_id}"
     try:
-        users = fetch_request(f"{league_url}/users")
+        # Users, rosters and league settings don't depend on each other
+        users_future = executor.submit(fetch_request, f"{league_url}/users")
+        rosters_future = executor.submit(fetch_request, f"{league_url}/rosters")
+        settings_future = executor.submit(fetch_request, f"{league_url}")
+
+        users = users_future.result()
         if users is None:
-            return None, None, None, None, None
+            return None
         
-        rosters = fetch_request(f"{league_url}/rosters")
+        rosters = rosters_future.result()
         if rosters is None:
-            return None, None, None, None, None
+            return None
         
-        league_settings = fetch_request(f"{league_url}")
+        league_settings = settings_future.result()
         if league_settings is None:
-            return None, None, None, None, None
+            return None
         
         # Get current wins
         current_wins = get_team_data(rosters, users)
                 
-        # Get remaining schedule
+        # Get the matchups of remaining weeks we don't have yet
         roster_to_teamname = get_roster_to_teamname_mapping(rosters, users)
         record = rosters[0]['metadata'].get('record')
         if not record:
             raise ValueError("Record metadata not found in rosters.")
         games_played = len(record)
-        remaining_schedule = []
         total_weeks = league_settings.get('settings', {}).get('playoff_week_start')
-        remaining_schedule = get_remaining_schedule(league_url, games_played, total_weeks, roster_to_teamname)
+        weeks = [week for week in range(games_played + 1, total_weeks) if week not in known_weeks]
+        matchups = get_week_matchups(league_url, weeks, roster_to_teamname)
+        if matchups is None:
+            return None
   
         # Get list of team names
         team_names = list(current_wins.keys())
@@ -96,8 +133,19 @@ def fetch_sleeper_playoff_odds_data(league_id):
         playoff_teams_count = league_settings.get('settings', {}).get('playoff_teams', 6)
         bye_teams_count = league_settings.get('settings', {}).get('playoff_byes', 2)
         
-        return current_wins, remaining_schedule, team_names, playoff_teams_count, bye_teams_count
+        return SeasonState(current_wins, team_names, playoff_teams_count, bye_teams_count,
+                           games_played + 1, total_weeks - 1, matchups)
         
     except Exception as e:
         print(f"Error fetching data from Sleeper API: {e}")
-        return None, None, None, None, None
\ No newline at end of file
+        return None
+
+def fetch_sleeper_playoff_odds_data(league_id):
+    season = fetch_sleeper_season(league_id)
+    if season is None:
+        return None
+    try:
+        return League.from_season(season, season.matchups)
+    except ValueError as e:
+        print(f"Error fetching data from Sleeper API: {e}")
+        return None
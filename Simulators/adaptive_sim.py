@@ -0,0 +1,70 @@
+# Adaptive early stopping for the Monte Carlo engine
+# - Simulates in small chunks and stops once every team's playoff odds are
+#   known to within a target confidence interval half-width
+# - Uses the Wilson score interval, which stays honest at 0% and 100%
+
+from statistics import NormalDist
+
+import numpy as np
+
+from Simulators.clinch import finish_bounds
+from Simulators.monte_carlo import accumulate_counts, chunk_plan, iter_chunks
+from Simulators.parallel_sim import iter_chunks_parallel
+
+# Smaller chunks than the fixed-count engine so the stopping check runs often
+ADAPTIVE_BATCH_SIZE = 2000
+
+
+def wilson_half_width(successes, trials, confidence=0.95):
+    """
+    Half-width of the Wilson score interval for each success count.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    return z / denominator * np.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials))
+
+
+def run_simulations_adaptive(inputs, target_ci, max_simulations, playoff_teams, bye_teams,
+                             seed=None, workers=1, confidence=0.95, progress=None):
+    """
+    Simulate until every team's playoff odds have a CI half-width of at most
+    `target_ci`, or until `max_simulations` have run.
+
+    Chunks are always consumed in plan order, so a seeded run stops at the same
+    point for any number of workers.
+
+    `progress`, if given, is called as progress(simulations, playoff_count,
+    bye_count, finish_sum) with the counts so far after every chunk. An
+    exception raised by it aborts the run.
+
+    Returns:
+    - playoff_count, bye_count, finish_sum: (teams,) integer arrays
+    - simulations: number of simulations actually run
+    - half_widths: (teams,) achieved CI half-width of each team's playoff odds
+    """
+    num_teams = len(inputs.teams)
+    best, worst = finish_bounds(inputs)
+    decided = (worst < playoff_teams) | (best >= playoff_teams)
+    plan = chunk_plan(max_simulations, seed, ADAPTIVE_BATCH_SIZE)
+    if workers > 1:
+        chunks = iter_chunks_parallel(inputs, plan, playoff_teams, bye_teams, workers)
+    else:
+        chunks = iter_chunks(inputs, plan, playoff_teams, bye_teams)
+
+    simulations = 0
+    playoff_count = bye_count = finish_sum = np.zeros(num_teams, dtype=np.int64)
+    half_widths = np.ones(num_teams)
+
+    try:
+        for simulations, playoff_count, bye_count, finish_sum in accumulate_counts(plan, chunks, num_teams):
+            # Teams the clinch pre-pass has already decided are known exactly
+            half_widths = np.where(decided, 0.0, wilson_half_width(playoff_count, simulations, confidence))
+            if progress is not None:
+                progress(simulations, playoff_count, bye_count, finish_sum)
+            if half_widths.max() <= target_ci:
+                break
+    finally:
+        chunks.close()
+
+    return playoff_count, bye_count, finish_sum, simulations, half_widths
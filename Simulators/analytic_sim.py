@@ -0,0 +1,276 @@
+# Closed-form approximation of playoff odds, for interactive previews
+# - Each game's win probability comes from the two teams' average points
+#   per game and the league-wide sigma, as in Simulators/exact_sim.py
+# - Every team's final win total is a Poisson-binomial distribution, computed
+#   exactly by dynamic programming; so is every pair's, including the games
+#   the two teams play against each other
+# - Given a team's final wins, the chance each rival finishes ahead of it is
+#   exact. Rivals are paired with a team they still play (latest games
+#   first), and each pair's chance of both finishing ahead is exact too, so
+#   a game whose winner goes ahead of the other is counted once. Only
+#   separate pairs are treated as independent; the number of rivals ahead
+#   is then a sum of independent 0/1/2 counts, computed by dynamic programming
+# - Ties on wins are broken by a normal approximation of each team's final
+#   points given its wins; clipping scores at zero is ignored, as in
+#   game_win_probabilities
+# - Error bound: against calculate_playoff_odds with 200,000 simulations on
+#   360 synthetic leagues (benchmarks/synthetic.py: 8-16 teams, 1-10 weeks
+#   left, std_dev 0.3-0.7, 4 seeds), the largest playoff or bye odds error
+#   of any team was 0.044, so ANALYTIC_ERROR_BOUND is 0.05. In 90% of the
+#   leagues every team was within 0.02, and average finishes were within
+#   0.1 places. Errors are largest with one or two weeks left, when a few
+#   games decide several spots at once
+
+import numpy as np
+
+from Simulators.batch_sim import game_rounds
+from Simulators.exact_sim import conditional_score_moments, game_win_probabilities, normal_cdf
+
+# Largest absolute error of playoff or bye odds against simulation (see above)
+ANALYTIC_ERROR_BOUND = 0.05
+
+
+def add_games(distribution, win_prob):
+    """
+    Add one game, won with probability win_prob, to win count distributions
+    over the last axis.
+    """
+    won = distribution[..., :-1] * win_prob[..., None]
+    distribution *= 1.0 - win_prob[..., None]
+    distribution[..., 1:] += won
+    return distribution
+
+
+def add_pair(distribution, first, second, both):
+    """
+    Add a pair of rivals to count distributions over the last axis: first
+    and second are each one's chance to count, both the chance they both do.
+    """
+    one = first + second - 2.0 * both
+    previous = distribution.copy()
+    distribution *= (1.0 - first - second + both)[..., None]
+    distribution[..., 1:] += previous[..., :-1] * one[..., None]
+    distribution[..., 2:] += previous[..., :-2] * both[..., None]
+    return distribution
+
+
+def schedule_partners(inputs):
+    """
+    Pair off teams that still play each other, taking the latest games first.
+
+    Returns:
+    - (teams,) index of each team's partner, -1 for a team left unpaired
+    """
+    partner = np.full(len(inputs.teams), -1)
+    for home_team, away_team in zip(inputs.home[::-1].tolist(), inputs.away[::-1].tolist()):
+        if partner[home_team] < 0 and partner[away_team] < 0:
+            partner[home_team] = away_team
+            partner[away_team] = home_team
+    return partner
+
+
+def win_distributions(inputs, home_prob, partner):
+    """
+    Distributions of every team's remaining wins, with and without each opponent.
+
+    Returns:
+    - excluded: (teams, teams + 1, max games + 1); [i, j] is team i's wins in
+      its games not against team j, and [i, teams] its wins in every game
+    - paired: like excluded, also leaving out games against i's partner
+    - head_to_head: (teams, teams, max meetings + 1); [i, j] is team i's wins
+      in its games against team j
+    - meetings: (teams, teams) games left between each pair
+    """
+    num_teams = len(inputs.teams)
+    games_left = np.bincount(inputs.home, minlength=num_teams) + np.bincount(inputs.away, minlength=num_teams)
+    meetings = np.zeros((num_teams, num_teams), dtype=np.int64)
+    np.add.at(meetings, (inputs.home, inputs.away), 1)
+    meetings += meetings.T
+
+    excluded = np.zeros((num_teams, num_teams + 1, games_left.max(initial=0) + 1))
+    excluded[..., 0] = 1.0
+    paired = excluded.copy()
+    head_to_head = np.zeros((num_teams, num_teams, meetings.max(initial=0) + 1))
+    head_to_head[..., 0] = 1.0
+    for games in game_rounds(inputs.home, inputs.away, len(inputs.teams)):
+        # Both sides of every game in the round: the team, its opponent and its chance to win
+        teams = np.concatenate([inputs.home[games], inputs.away[games]])
+        opponents = np.concatenate([inputs.away[games], inputs.home[games]])
+        win_prob = np.concatenate([home_prob[games], 1.0 - home_prob[games]])
+
+        per_pair = np.repeat(win_prob[:, None], num_teams + 1, axis=1)
+        per_pair[np.arange(len(teams)), opponents] = 0.0
+        excluded[teams] = add_games(excluded[teams], per_pair)
+        per_pair[partner[teams] == opponents] = 0.0
+        paired[teams] = add_games(paired[teams], per_pair)
+        head_to_head[teams, opponents] = add_games(head_to_head[teams, opponents], win_prob)
+    return excluded, paired, head_to_head, meetings
+
+
+def meeting_posterior(excluded, head_to_head):
+    """
+    Chance team i won h of its games against j given it won x in all, at
+    [i, j, x, h]: x - h wins elsewhere times h in the meetings, over x.
+    """
+    num_teams, _, length = excluded.shape
+    total = excluded[:, num_teams]
+    elsewhere = np.arange(length)[:, None] - np.arange(head_to_head.shape[-1])[None, :]  # (x, h)
+    padded = np.concatenate([excluded[:, :num_teams], np.zeros((num_teams, num_teams, 1))], axis=-1)
+    joint = padded[:, :, np.where(elsewhere >= 0, elsewhere, length)] * head_to_head[:, :, None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total[:, None, :, None] > 0, joint / total[:, None, :, None], 0.0)
+
+
+def points_given_wins(inputs, posterior, meetings):
+    """
+    Mean and variance of every team's final points given its remaining wins.
+
+    A team that wins more of its games also scored more in them, which
+    matters when two teams end level on wins. Each game's score moments
+    given its winner come from conditional_score_moments; the chance a team
+    won a game against j, given x wins in all, is its expected share of
+    wins against j under `posterior`.
+
+    Returns:
+    - mean, variance: (teams, max games + 1) arrays
+    """
+    num_teams = len(inputs.teams)
+    moments = conditional_score_moments(inputs)
+    sums = {}
+    for result in ('win', 'loss'):
+        for moment in (0, 1):
+            # Summed over a pair's games, from each side's point of view
+            total = np.zeros((num_teams, num_teams))
+            np.add.at(total, (inputs.home, inputs.away), moments[('home', result)][moment])
+            np.add.at(total, (inputs.away, inputs.home), moments[('away', result)][moment])
+            sums[result, moment] = total[:, :, None]
+
+    won = np.arange(posterior.shape[-1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.where(meetings[:, :, None] > 0, (posterior * won).sum(axis=-1) / meetings[:, :, None], 0.0)
+    mean = inputs.base_points[:, None] + (share * sums['win', 0] + (1 - share) * sums['loss', 0]).sum(axis=1)
+    variance = (share * sums['win', 1] + (1 - share) * sums['loss', 1]).sum(axis=1)
+    return mean, variance
+
+
+def tiebreak_odds(inputs, mean, variance):
+    """
+    Probability that team j finishes with more points than team i when both
+    end level on wins, at [i, j, x] for i winning x more games.
+
+    Final points are approximated as normal with points_given_wins moments.
+    """
+    num_teams, length = mean.shape
+    base_wins = np.rint(inputs.base_wins).astype(np.int64)
+    rival_wins = np.clip(base_wins[:, None, None] + np.arange(length) - base_wins[None, :, None], 0, length - 1)
+    rivals = np.arange(num_teams)[None, :, None]
+    difference = mean[rivals, rival_wins] - mean[:, None, :]
+    spread = np.sqrt(variance[rivals, rival_wins] + variance[:, None, :])
+
+    # With no spread left the order is fixed; exact ties keep team order, like rank_batch
+    index = np.arange(num_teams)
+    earlier = (index[None, :] < index[:, None])[:, :, None]
+    odds = ((difference > 0) | ((difference == 0) & earlier)).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(spread > 0, normal_cdf(difference / spread), odds)
+
+
+def finish_ahead(rival, margin, tiebreak):
+    """
+    Chance j finishes ahead of i, at [i, j, ...], when j needs more than
+    `margin` wins from games with distribution rival[i, j], or exactly that
+    many and the points tiebreak.
+    """
+    num_teams, _, length = rival.shape
+    survival = np.concatenate([np.cumsum(rival[..., ::-1], axis=-1)[..., ::-1],
+                               np.zeros((num_teams, num_teams, 1))], axis=-1)
+    padded = np.concatenate([rival, np.zeros((num_teams, num_teams, 1))], axis=-1)
+    flat = margin.reshape(num_teams, num_teams, -1)
+    more = np.take_along_axis(survival, np.clip(flat + 1, 0, length), axis=-1)
+    level = np.take_along_axis(padded, np.where((flat >= 0) & (flat < length), flat, length), axis=-1)
+    return (more + level * tiebreak.reshape(flat.shape[:2] + (-1,))).reshape(margin.shape)
+
+
+def ahead_given_wins(inputs, excluded, paired, head_to_head, meetings, partner):
+    """
+    Chance rivals finish ahead of team i given i's remaining wins.
+
+    Conditioning on i's wins also conditions the games i and j play each
+    other; j's other games are independent of i's, and of i's other rivals'
+    except through the games they play each other.
+
+    Returns:
+    - ahead: (teams, teams, max games + 1); [i, j, x] is the chance j
+      finishes ahead of i winning x more games, 0 where j == i
+    - together: same shape; the chance j and its partner both do
+    """
+    num_teams, _, length = excluded.shape
+    meeting_count = head_to_head.shape[-1]
+    base_wins = np.rint(inputs.base_wins).astype(np.int64)
+    posterior = meeting_posterior(excluded, head_to_head)
+    tiebreak = tiebreak_odds(inputs, *points_given_wins(inputs, posterior, meetings))
+
+    # j ends level with i when its other wins equal this margin; more is ahead
+    won = np.arange(meeting_count)
+    margin = (base_wins[:, None, None, None] + np.arange(length)[None, None, :, None]
+              - base_wins[None, :, None, None] - (meetings[:, :, None, None] - won))
+    ahead = (posterior * finish_ahead(excluded[:, :num_teams].transpose(1, 0, 2), margin,
+                                      np.broadcast_to(tiebreak[..., None], margin.shape))).sum(axis=-1)
+
+    # The same with j's games against its partner taken out and given g wins
+    # in them: the pair's chance of both finishing ahead sums over g
+    shifted = margin[..., None] - won
+    given_meetings = (posterior[..., None] * finish_ahead(
+        paired[:, :num_teams].transpose(1, 0, 2), shifted,
+        np.broadcast_to(tiebreak[..., None, None], shifted.shape))).sum(axis=-2)
+    has_partner = partner >= 0
+    mate = np.where(has_partner, partner, np.arange(num_teams))
+    meeting_pmf = head_to_head[np.arange(num_teams), mate]  # (j, g)
+    mate_won = np.clip(meetings[np.arange(num_teams), mate][:, None] - won, 0, meeting_count - 1)
+    mate_given = np.take_along_axis(given_meetings[:, mate],
+                                    np.broadcast_to(mate_won[None, :, None, :], given_meetings.shape), axis=-1)
+    together = (meeting_pmf[None, :, None, :] * given_meetings * mate_given).sum(axis=-1)
+
+    ahead[np.arange(num_teams), np.arange(num_teams)] = 0.0
+    # Teams in different clinch blocks always finish in block order
+    block_start = np.empty(num_teams, dtype=np.int64)
+    for start, members in inputs.blocks:
+        block_start[members] = start
+    settled = block_start[:, None] != block_start[None, :]
+    ahead[settled] = (block_start[None, :] < block_start[:, None])[settled][:, None]
+
+    first, second = ahead, ahead[:, mate]
+    independent = (settled | settled[:, mate])[:, :, None]
+    together = np.where(independent, first * second, together)
+    together = np.clip(together, np.maximum(first + second - 1.0, 0.0), np.minimum(first, second))
+    together[:, ~has_partner] = 0.0
+    return ahead, together
+
+
+def analytic_odds(inputs, playoff_teams, bye_teams):
+    """
+    Approximate playoff and bye odds without simulating.
+
+    Returns:
+    - playoff_prob, bye_prob, average_finish: (teams,) float arrays
+    """
+    num_teams = len(inputs.teams)
+    partner = schedule_partners(inputs)
+    excluded, paired, head_to_head, meetings = win_distributions(inputs, game_win_probabilities(inputs), partner)
+    ahead, together = ahead_given_wins(inputs, excluded, paired, head_to_head, meetings, partner)
+    total = excluded[:, num_teams]
+
+    # Number of teams ahead of i given its wins, adding a pair or a lone rival at a time
+    ahead_count = np.zeros(total.shape + (num_teams + 1,))
+    ahead_count[..., 0] = 1.0
+    for rival in range(num_teams):
+        if partner[rival] < 0:
+            add_games(ahead_count, ahead[:, rival])
+        elif rival < partner[rival]:
+            add_pair(ahead_count, ahead[:, rival], ahead[:, partner[rival]], together[:, rival])
+    at_or_above = np.cumsum(ahead_count, axis=-1)
+
+    playoff_prob = (total * at_or_above[..., playoff_teams - 1]).sum(axis=-1) if playoff_teams else np.zeros(num_teams)
+    bye_prob = (total * at_or_above[..., bye_teams - 1]).sum(axis=-1) if bye_teams else np.zeros(num_teams)
+    average_finish = 1.0 + (total * ahead.sum(axis=1)).sum(axis=-1)
+    return np.clip(playoff_prob, 0.0, 1.0), np.clip(bye_prob, 0.0, 1.0), average_finish
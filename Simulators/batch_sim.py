@@ -0,0 +1,202 @@
+# Packed multi-league Monte Carlo engine
+# - Leagues with the same number of teams and simulation count are laid side
+#   by side in one set of arrays, so every numpy call in a chunk covers the
+#   whole pack instead of paying its overhead once per league
+# - Every league draws its scores from its own chunk seeds (see chunk_plan),
+#   exactly as calculate_playoff_odds does, so a seeded league gets the same
+#   odds alone or in any pack
+# - Ranking sorts a (leagues, teams, simulations) array along the team axis,
+#   so a pack costs no more per league than ranking the leagues one by one
+
+from collections import namedtuple
+
+import numpy as np
+
+import metrics
+from Simulators.monte_carlo import BATCH_SIZE, chunk_plan
+from Simulators.parallel_sim import map_ordered
+
+# Score cells (simulation rows x packed games) drawn per chunk; packs are
+# split so the score matrices of one chunk stay around 32MB each
+MAX_PACKED_CELLS = 2 ** 22
+
+PackedInputs = namedtuple('PackedInputs', [
+    'leagues',        # SimInputs of every league in the pack, all with the same team count
+    'base_wins',      # (leagues * teams,) current wins, league after league
+    'base_points',    # (leagues * teams,) current points for
+    'home',           # (games,) packed column of each game's home team
+    'away',           # (games,) packed column of each game's away team
+    'home_mean',      # (games,) home team's average points per game
+    'away_mean',      # (games,) away team's average points per game
+    'game_sigma',     # (games,) spread of a weekly score in that game's league
+    'game_offsets',   # (leagues + 1,) start of each league's games in the game axis
+    'rounds',         # list of game index arrays in which no team plays twice
+    'playoff_teams',  # (leagues, 1) playoff spots per league
+    'bye_teams',      # (leagues, 1) byes per league
+])
+
+
+def game_rounds(home, away, num_columns):
+    """
+    Split games into rounds in which every team plays at most once.
+
+    Adding a round's results with fancy indexing is then safe: no column is
+    written twice by the same `+=`.
+    """
+    next_round = np.zeros(num_columns, dtype=np.intp)
+    assigned = np.empty(len(home), dtype=np.intp)
+    for game, (h, a) in enumerate(zip(home, away)):
+        assigned[game] = max(next_round[h], next_round[a])
+        next_round[h] = next_round[a] = assigned[game] + 1
+    return [np.flatnonzero(assigned == r) for r in range(assigned.max() + 1)] if len(home) else []
+
+
+def pack_leagues(league_inputs, playoff_teams, bye_teams):
+    """
+    Lay out leagues with the same team count side by side.
+
+    Parameters:
+    - league_inputs: list of SimInputs from build_sim_inputs
+    - playoff_teams, bye_teams: per-league lists
+    """
+    num_teams = len(league_inputs[0].teams)
+    if any(len(inputs.teams) != num_teams for inputs in league_inputs):
+        raise ValueError('Every league in a pack must have the same number of teams')
+
+    offsets = np.arange(len(league_inputs)) * num_teams
+    home = np.concatenate([inputs.home + offset for inputs, offset in zip(league_inputs, offsets)])
+    away = np.concatenate([inputs.away + offset for inputs, offset in zip(league_inputs, offsets)])
+    game_offsets = np.cumsum([0] + [len(inputs.home) for inputs in league_inputs])
+    return PackedInputs(
+        leagues=list(league_inputs),
+        base_wins=np.concatenate([inputs.base_wins for inputs in league_inputs]),
+        base_points=np.concatenate([inputs.base_points for inputs in league_inputs]),
+        home=home,
+        away=away,
+        home_mean=np.concatenate([inputs.avg_ppg[inputs.home] for inputs in league_inputs]),
+        away_mean=np.concatenate([inputs.avg_ppg[inputs.away] for inputs in league_inputs]),
+        game_sigma=np.repeat([inputs.sigma for inputs in league_inputs], np.diff(game_offsets)),
+        game_offsets=game_offsets,
+        rounds=game_rounds(home, away, len(league_inputs) * num_teams),
+        playoff_teams=np.array(playoff_teams)[:, None],
+        bye_teams=np.array(bye_teams)[:, None],
+    )
+
+
+def simulate_packed(packed, seed_seqs, size):
+    """
+    Simulate the rest of the season `size` times for every league in the pack.
+
+    Each league's scores come from its own generator, drawn in the same order
+    as simulate_batch so seeded leagues reproduce their single-league runs.
+    Generator.normal computes mean + sigma * z for each standard normal z, so
+    drawing z per league and scaling the whole pack at once gives the same
+    scores for less work. Arrays are laid out (columns, simulations) here, so
+    adding up a round of games touches whole contiguous rows.
+
+    Returns:
+    - wins, points: (leagues * teams, size) final totals
+    """
+    num_games = packed.game_offsets[-1]
+    home_points = np.empty((num_games, size))
+    away_points = np.empty((num_games, size))
+    for seed_seq, start, end in zip(seed_seqs, packed.game_offsets[:-1], packed.game_offsets[1:]):
+        rng = np.random.default_rng(seed_seq)
+        home_points[start:end] = rng.standard_normal((size, end - start)).T
+        away_points[start:end] = rng.standard_normal((size, end - start)).T
+    home_points *= packed.game_sigma[:, None]
+    home_points += packed.home_mean[:, None]
+    away_points *= packed.game_sigma[:, None]
+    away_points += packed.away_mean[:, None]
+
+    # Ensure points don't go negative
+    np.maximum(home_points, 0, out=home_points)
+    np.maximum(away_points, 0, out=away_points)
+
+    # Home team wins only on a strictly higher score, otherwise the away team does
+    home_won = (home_points > away_points).astype(np.float64)
+
+    wins = np.repeat(packed.base_wins[:, None], size, axis=1)
+    points = np.repeat(packed.base_points[:, None], size, axis=1)
+    for games in packed.rounds:
+        home, away = packed.home[games], packed.away[games]
+        wins[home] += home_won[games]
+        wins[away] += 1.0 - home_won[games]
+        points[home] += home_points[games]
+        points[away] += away_points[games]
+    return wins, points
+
+
+def rank_packed(packed, wins, points):
+    """
+    Finishing position (0 = first) of every team within its own league.
+
+    Returns:
+    - (leagues, teams, size) positions, ordered like rank_batch
+    """
+    shape = (len(packed.leagues), -1, wins.shape[1])
+    order = np.lexsort((-points.reshape(shape), -wins.reshape(shape)), axis=1)
+    positions = np.empty_like(order)
+    ranks = np.broadcast_to(np.arange(order.shape[1])[:, None], order.shape)
+    np.put_along_axis(positions, order, ranks, axis=1)
+    return positions
+
+
+def run_packed_chunk(packed, size, seed_seqs):
+    """
+    Simulate one chunk of every league and return (leagues, teams) counters.
+    """
+    with metrics.span('simulate', engine='packed'):
+        wins, points = simulate_packed(packed, seed_seqs, size)
+    with metrics.span('rank', engine='packed'):
+        positions = rank_packed(packed, wins, points)
+    with metrics.span('aggregate', engine='packed'):
+        playoff_count = np.count_nonzero(positions < packed.playoff_teams[:, :, None], axis=-1)
+        bye_count = np.count_nonzero(positions < packed.bye_teams[:, :, None], axis=-1)
+        finish_sum = positions.sum(axis=-1) + size
+        return playoff_count, bye_count, finish_sum
+
+
+def split_packs(league_inputs, batch_size=BATCH_SIZE):
+    """
+    Group league indices into packs small enough to simulate one chunk at a time.
+    """
+    max_games = max(1, MAX_PACKED_CELLS // batch_size)
+    packs, current, games = [], [], 0
+    for i, inputs in enumerate(league_inputs):
+        if current and games + len(inputs.home) > max_games:
+            packs.append(current)
+            current, games = [], 0
+        current.append(i)
+        games += len(inputs.home)
+    if current:
+        packs.append(current)
+    return packs
+
+
+def run_packed(league_inputs, num_simulations, playoff_teams, bye_teams, seeds, workers=1):
+    """
+    Simulate many leagues with the same team count and simulation count.
+
+    Parameters:
+    - league_inputs: list of SimInputs
+    - playoff_teams, bye_teams, seeds: per-league lists
+    - workers: processes to spread the chunks of every pack over
+
+    Yields:
+    - index into league_inputs, (playoff_count, bye_count, finish_sum) for
+      every league as soon as its pack finishes, totalled over the whole run
+      as accumulate_counts would
+    """
+    plans = [chunk_plan(num_simulations, seed) for seed in seeds]
+    sizes = [size for size, _ in plans[0]]
+    for pack in split_packs(league_inputs):
+        packed = pack_leagues([league_inputs[i] for i in pack],
+                              [playoff_teams[i] for i in pack],
+                              [bye_teams[i] for i in pack])
+        calls = ((packed, size, [plans[i][chunk][1] for i in pack]) for chunk, size in enumerate(sizes))
+        totals = None
+        for counts in map_ordered(run_packed_chunk, calls, workers):
+            totals = counts if totals is None else tuple(total + count for total, count in zip(totals, counts))
+        for row, i in enumerate(pack):
+            yield i, tuple(total[row] for total in totals)
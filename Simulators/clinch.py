@@ -0,0 +1,91 @@
+# Deterministic clinch/elimination pre-pass
+# - Bounds every team's final wins and points from the remaining schedule
+# - Proves which teams always finish ahead of which, without simulating
+# - Splits the standings into blocks whose finishing positions are fixed sets,
+#   so the simulator only has to rank teams that are still contested
+
+import numpy as np
+
+
+def always_ahead(inputs):
+    """
+    (teams x teams) boolean matrix: entry [i, j] is True when team i finishes
+    ahead of team j in every possible outcome of the remaining schedule.
+
+    Team i is always ahead when its fewest possible wins beat j's most possible
+    wins, or equal them while j has no games left and i already has more
+    points than j can finish with. Scores are never negative, so current
+    points are a lower bound, but a team with games left has no upper bound.
+    """
+    num_teams = len(inputs.teams)
+    games_left = (np.bincount(inputs.home, minlength=num_teams)
+                  + np.bincount(inputs.away, minlength=num_teams))
+
+    min_wins = inputs.base_wins
+    max_wins = inputs.base_wins + games_left
+    min_points = inputs.base_points
+    max_points = np.where(games_left > 0, np.inf, inputs.base_points)
+
+    more_wins = min_wins[:, None] > max_wins[None, :]
+    tied_on_points = (min_wins[:, None] == max_wins[None, :]) & (min_points[:, None] > max_points[None, :])
+    return more_wins | tied_on_points
+
+
+def finish_bounds(inputs):
+    """
+    Best and worst possible finishing position (0 = first) of every team.
+    """
+    ahead = always_ahead(inputs)
+    best = ahead.sum(axis=0)
+    worst = len(inputs.teams) - 1 - ahead.sum(axis=1)
+    return best, worst
+
+
+def finish_blocks(best, worst):
+    """
+    Group teams whose possible finishing positions overlap.
+
+    Every team in a block always finishes ahead of every team in a later block,
+    so a block of k teams starting at position `start` always fills exactly
+    positions start..start+k-1. Only its internal order is left to chance.
+
+    Returns:
+    - list of (start, team indices) pairs, team indices in ascending order
+    """
+    order = np.lexsort((worst, best))
+    blocks = []
+    members = []
+    start = 0
+    block_end = -1
+    for team in order:
+        if members and best[team] > block_end:
+            blocks.append((start, np.sort(members)))
+            start += len(members)
+            members = []
+        members.append(team)
+        block_end = max(block_end, worst[team])
+    blocks.append((start, np.sort(members)))
+    return blocks
+
+
+def clinch_status(inputs, playoff_teams, bye_teams):
+    """
+    Clinch and elimination status of every team, without running any simulation.
+
+    Returns:
+    - dict with team names as keys and dicts of best_finish, worst_finish
+      (1-based), clinched_playoffs, eliminated, clinched_bye and
+      eliminated_from_bye as values
+    """
+    best, worst = finish_bounds(inputs)
+    return {
+        team: {
+            'best_finish': int(best[i]) + 1,
+            'worst_finish': int(worst[i]) + 1,
+            'clinched_playoffs': bool(worst[i] < playoff_teams),
+            'eliminated': bool(best[i] >= playoff_teams),
+            'clinched_bye': bool(worst[i] < bye_teams),
+            'eliminated_from_bye': bool(best[i] >= bye_teams),
+        }
+        for i, team in enumerate(inputs.teams)
+    }
@@ -0,0 +1,330 @@
+# Exact enumeration engine for short remaining schedules
+# - Enumerates every win/loss combination of the games that can still matter,
+#   weighted by each game's win probability
+# - Win totals are therefore exact; only the points tiebreaker between teams
+#   level on wins is approximated, by sampling each game's two scores jointly
+#   given its winner
+
+import numpy as np
+
+from Simulators.monte_carlo import rank_batch, schedule_matrices
+
+# Above this many outcome combinations (10 contested games) Monte Carlo is cheaper
+EXACT_MAX_OUTCOMES = 1024
+
+# Total (outcome, points sample) pairs ranked by default; callers replacing a
+# Monte Carlo run pass its simulation count instead
+TIEBREAK_ROWS = 2 ** 16
+
+# Enumerating replaces a run only when it has at least this many simulations
+# per outcome; below that, ranking one row for every outcome costs more than
+# simulating
+MIN_SIMULATIONS_PER_OUTCOME = 16
+
+# Pairs ranked per pass, to bound memory
+ROWS_PER_PASS = 16384
+
+# Rational approximations of the inverse normal CDF (P. J. Acklam), relative
+# error below 1.2e-9: one for the centre, one for either tail
+INV_CDF_LOW = 0.02425
+INV_CDF_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+             1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+INV_CDF_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+             6.680131188771972e+01, -1.328068155288572e+01, 1.0)
+INV_CDF_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+             -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+INV_CDF_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+             3.754408661907416e+00, 1.0)
+
+
+def normal_cdf(z):
+    """
+    Standard normal CDF over an array, from the Numerical Recipes erfc
+    approximation (relative error under 1.2e-7); far cheaper than calling
+    NormalDist per element.
+    """
+    x = np.abs(z) / np.sqrt(2)
+    t = 1.0 / (1.0 + 0.5 * x)
+    polynomial = 0.17087277
+    for coefficient in (-0.82215223, 1.48851587, -1.13520398, 0.27886807, -0.18628806,
+                        0.09678418, 0.37409196, 1.00002368, -1.26551223):
+        polynomial = coefficient + t * polynomial
+    tail = 0.5 * t * np.exp(-x * x + polynomial)  # P(Z > |z|)
+    return np.where(z < 0, tail, 1.0 - tail)
+
+
+def normal_pdf(z):
+    """
+    Standard normal PDF over an array.
+    """
+    return np.exp(-0.5 * z * z) / np.sqrt(2 * np.pi)
+
+
+def normal_inv_cdf(p):
+    """
+    Standard normal quantiles of an array of probabilities in (0, 1].
+    """
+    q = p - 0.5
+    r = q * q
+    quantiles = q * horner(INV_CDF_A, r) / horner(INV_CDF_B, r)
+    # Lower-tail quantile of the smaller tail, mirrored for the upper one;
+    # only evaluated where it's needed
+    in_tail = np.abs(q) > 0.5 - INV_CDF_LOW
+    tail_p = p[in_tail]
+    tail = np.maximum(np.minimum(tail_p, 1 - tail_p), np.finfo(np.float64).tiny)
+    t = np.sqrt(-2 * np.log(tail))
+    lower = horner(INV_CDF_C, t) / horner(INV_CDF_D, t)
+    quantiles[in_tail] = np.where(tail_p < 0.5, lower, -lower)
+    return quantiles
+
+
+def horner(coefficients, x):
+    """
+    Polynomial with `coefficients` (highest power first) at every element of x.
+    """
+    result = x * coefficients[0] + coefficients[1]
+    for coefficient in coefficients[2:]:
+        result *= x
+        result += coefficient
+    return result
+
+
+def game_win_probabilities(inputs):
+    """
+    Probability that the home team wins each remaining game.
+
+    Both scores are normal with the league-wide sigma, so the home margin is
+    normal with sigma * sqrt(2). Clipping scores at zero is ignored; it only
+    matters when a team's expected score is within a few sigma of zero.
+    """
+    margin = inputs.avg_ppg[inputs.home] - inputs.avg_ppg[inputs.away]
+    if inputs.sigma == 0:
+        # Home only wins on a strictly higher score
+        return (margin > 0).astype(np.float64)
+    return normal_cdf(margin / (inputs.sigma * np.sqrt(2)))
+
+
+def conditional_score_moments(inputs):
+    """
+    Mean and variance of each game's home and away score, given who won.
+
+    Write the scores as a sum S = home + away and margin D = home - away. With
+    equal variances S and D are independent, so conditioning on the winner
+    only truncates D: home = (S + D) / 2 and away = (S - D) / 2.
+
+    Returns:
+    - dict keyed by ('home' | 'away', 'win' | 'loss') of (mean, variance)
+      (games,) array pairs, from the point of view of that side
+    """
+    home_avg = inputs.avg_ppg[inputs.home]
+    away_avg = inputs.avg_ppg[inputs.away]
+    margin = home_avg - away_avg
+    sigma = inputs.sigma
+    if sigma == 0:
+        zero = np.zeros(len(margin))
+        return {(side, result): (avg, zero)
+                for side, avg in (('home', home_avg), ('away', away_avg))
+                for result in ('win', 'loss')}
+
+    spread = sigma * np.sqrt(2)
+    # Bound the standardized margin so hopeless outcomes don't divide by zero;
+    # they carry (almost) no weight anyway
+    z = np.clip(margin / spread, -8, 8)
+    pdf = normal_pdf(z)
+    cdf = normal_cdf(z)
+
+    # Mean shift and variance of D given home wins (D > 0) or loses (D < 0)
+    win_ratio = pdf / cdf
+    loss_ratio = pdf / (1 - cdf)
+    win_shift = spread * win_ratio
+    loss_shift = spread * loss_ratio
+    win_var = spread ** 2 * (1 - win_ratio * (win_ratio + z))
+    loss_var = spread ** 2 * (1 - loss_ratio * (loss_ratio - z))
+
+    half_sum_var = sigma ** 2 / 2
+    return {
+        ('home', 'win'): (home_avg + win_shift / 2, half_sum_var + win_var / 4),
+        ('away', 'loss'): (away_avg - win_shift / 2, half_sum_var + win_var / 4),
+        ('home', 'loss'): (home_avg - loss_shift / 2, half_sum_var + loss_var / 4),
+        ('away', 'win'): (away_avg + loss_shift / 2, half_sum_var + loss_var / 4),
+    }
+
+
+def contested_games(inputs):
+    """
+    Indices of games involving at least one team whose finishing spot is still open.
+
+    Games between teams the clinch pre-pass has already placed can't change
+    the standings, so they don't need to be enumerated.
+    """
+    settled = np.zeros(len(inputs.teams), dtype=bool)
+    for _, members in inputs.blocks:
+        if len(members) == 1:
+            settled[members[0]] = True
+    return np.flatnonzero(~(settled[inputs.home] & settled[inputs.away]))
+
+
+def count_outcomes(inputs):
+    """
+    Number of win/loss combinations the exact engine would have to enumerate.
+    """
+    return 2 ** len(contested_games(inputs))
+
+
+def use_exact(inputs, num_simulations, exact_threshold=EXACT_MAX_OUTCOMES):
+    """
+    Whether to enumerate instead of running `num_simulations` simulations.
+
+    The exact engine ranks about as many rows as the run it replaces, plus
+    one per outcome (see weighted_positions), so it is only used with at most
+    `exact_threshold` outcomes and MIN_SIMULATIONS_PER_OUTCOME simulations
+    for each.
+    """
+    outcomes = count_outcomes(inputs)
+    return outcomes <= exact_threshold and outcomes * MIN_SIMULATIONS_PER_OUTCOME <= num_simulations
+
+
+def enumerate_outcomes(inputs, playoff_teams, bye_teams, seed=None, rows=TIEBREAK_ROWS):
+    """
+    Exact playoff and bye odds over every outcome of the contested games.
+
+    `rows` is the tiebreak sample budget (see weighted_positions).
+
+    Returns:
+    - playoff_prob, bye_prob, average_finish: (teams,) float arrays
+    """
+    num_teams = len(inputs.teams)
+    playoff_prob = np.zeros(num_teams)
+    bye_prob = np.zeros(num_teams)
+    average_finish = np.zeros(num_teams)
+    for weights, positions in weighted_positions(inputs, seed, rows):
+        playoff_prob += weights @ (positions < playoff_teams)
+        bye_prob += weights @ (positions < bye_teams)
+        average_finish += weights @ (positions + 1)
+
+    return playoff_prob, bye_prob, average_finish
+
+
+def finish_distribution(inputs, seed=None, rows=TIEBREAK_ROWS):
+    """
+    Exact probability of every team finishing in every position.
+
+    `rows` is the tiebreak sample budget (see weighted_positions).
+
+    Returns:
+    - (teams, positions) float array; row i sums to 1
+    """
+    num_teams = len(inputs.teams)
+    cells = np.arange(num_teams) * num_teams
+    distribution = np.zeros(num_teams * num_teams)
+    for weights, positions in weighted_positions(inputs, seed, rows):
+        distribution += np.bincount((cells + positions).ravel(),
+                                    weights=np.repeat(weights, num_teams),
+                                    minlength=num_teams * num_teams)
+    return distribution.reshape(num_teams, num_teams)
+
+
+def weighted_positions(inputs, seed=None, rows=TIEBREAK_ROWS):
+    """
+    Rank every outcome of the contested games, a pass at a time.
+
+    An outcome where no two teams that could swap places are level on wins
+    is ranked by its wins alone, so one row covers it. The other outcomes
+    share about `rows` points samples in proportion to their probability
+    (stratified sampling), which is never noisier than simulating as many
+    seasons and is as fast: a row costs the same to rank as a simulation.
+
+    Yields:
+    - (rows,) probability weights and (rows, teams) finishing positions, each
+      row one outcome paired with one sample of the points tiebreaker
+    """
+    games = contested_games(inputs)
+    all_home_matrix, all_away_matrix = schedule_matrices(inputs)
+    home_matrix, away_matrix = all_home_matrix[games], all_away_matrix[games]
+    home_win_prob = game_win_probabilities(inputs)[games]
+
+    # Row n of `home_won` is outcome n: bit g set when the home team wins game g
+    outcomes = np.arange(2 ** len(games))
+    home_won = ((outcomes[:, None] >> np.arange(len(games))) & 1).astype(np.float64)
+    weights = np.prod(np.where(home_won == 1, home_win_prob, 1 - home_win_prob), axis=1)
+
+    # Outcomes with zero probability (e.g. std_dev=0) are skipped outright
+    possible = weights > 0
+    home_won, weights = home_won[possible], weights[possible]
+
+    # Games between settled teams are left out of these win totals; rank_batch
+    # places settled teams by their block and never compares their wins
+    wins = inputs.base_wins + home_won @ home_matrix + (1.0 - home_won) @ away_matrix
+
+    # Games that aren't enumerated only involve settled teams, whose points
+    # never decide a position, so they count at their expected score
+    other = np.ones(len(inputs.home), dtype=bool)
+    other[games] = False
+    base_points = (inputs.base_points
+                   + inputs.avg_ppg[inputs.home[other]] @ all_home_matrix[other]
+                   + inputs.avg_ppg[inputs.away[other]] @ all_away_matrix[other])
+
+    samples = np.ones(len(weights), dtype=np.intp)
+    tied = tied_on_wins(wins, inputs.blocks)
+    if tied.any():
+        share = weights[tied] / weights[tied].sum()
+        samples[tied] = np.maximum(1, np.rint(rows * share)).astype(np.intp)
+    outcome_rows = np.repeat(np.arange(len(weights)), samples)
+    row_weights = np.repeat(weights / samples, samples)
+    rng = np.random.default_rng(seed)
+
+    for first in range(0, len(outcome_rows), ROWS_PER_PASS):
+        rows = outcome_rows[first:first + ROWS_PER_PASS]
+        home_points, away_points = contested_scores(inputs, games, home_won[rows], rng)
+        points = base_points + home_points @ home_matrix + away_points @ away_matrix
+        yield row_weights[first:first + ROWS_PER_PASS], rank_batch(wins[rows], points, inputs.blocks)
+
+
+def tied_on_wins(wins, blocks):
+    """
+    (outcomes,) whether any two teams in the same clinch block have equal wins.
+    """
+    tied = np.zeros(len(wins), dtype=bool)
+    for _, members in blocks:
+        if len(members) > 1:
+            block_wins = np.sort(wins[:, members], axis=1)
+            tied |= (np.diff(block_wins, axis=1) == 0).any(axis=1)
+    return tied
+
+
+def contested_scores(inputs, games, home_won, rng):
+    """
+    Draw both scores of every contested game given who won it, once per row of home_won.
+
+    The sum S = home + away and margin D = home - away are independent
+    normals (see conditional_score_moments), so S is drawn as is and D from
+    its normal truncated to the winner's side, by inverting the CDF of that
+    side. Scores are then clipped at zero like simulated ones; the outcome
+    weights still ignore clipping (see game_win_probabilities).
+
+    Returns:
+    - home_points, away_points: (rows, games) scores
+    """
+    home_avg = inputs.avg_ppg[inputs.home[games]]
+    away_avg = inputs.avg_ppg[inputs.away[games]]
+    # Half the sum and half the margin, so home = S/2 + D/2 and away = S/2 - D/2
+    half_total = np.broadcast_to((home_avg + away_avg) / 2, home_won.shape)
+    half_margin = np.broadcast_to((home_avg - away_avg) / 2, home_won.shape)
+    if inputs.sigma > 0:
+        spread = inputs.sigma * np.sqrt(2)
+        half_total = half_total + rng.standard_normal(home_won.shape) * (spread / 2)
+        # Standardized margin D is truncated below (home wins) or above
+        # (home loses) at -z. Both are drawn as a quantile of the lower tail
+        # of the winner's side, which keeps unlikely upsets accurate.
+        z = (home_avg - away_avg) / spread
+        loss_prob = normal_cdf(-z)
+        side_prob = loss_prob + home_won * (normal_cdf(z) - loss_prob)
+        uniform = rng.random(home_won.shape)
+        np.subtract(1.0, uniform, out=uniform)
+        uniform *= side_prob
+        # Home wins move the margin up from -z, losses down
+        quantile = normal_inv_cdf(uniform)
+        quantile *= (1.0 - 2.0 * home_won) * (spread / 2)
+        half_margin = half_margin + quantile
+    # Ensure points don't go negative, as in simulate_games
+    return np.maximum(half_total + half_margin, 0), np.maximum(half_total - half_margin, 0)
@@ -0,0 +1,119 @@
+# What-if / leverage analysis from one set of simulations
+# - Every simulated season keeps which side won each remaining game and who
+#   made the playoffs and a bye, packed eight to a byte
+# - Odds conditional on any game's result come from the seasons where it
+#   happened, so a per-game breakdown costs no extra simulation
+# - Pinning results filters the same samples down to the seasons consistent
+#   with them; samples are cached per league so what-if queries don't
+#   simulate again
+# - Configured from the environment:
+#   LEVERAGE_CACHE_SIZE (sample sets kept in memory, default 32)
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+import metrics
+from cache import TTLCache
+from Simulators.monte_carlo import BATCH_SIZE, rank_batch, season_totals, simulate_games
+from Simulators.sample_store import load_scores
+
+OutcomeSamples = namedtuple('OutcomeSamples', [
+    'home_won',   # (simulations, ceil(games / 8)) packed: home team won game g
+    'playoffs',   # (simulations, ceil(teams / 8)) packed: team made the playoffs
+    'byes',       # (simulations, ceil(teams / 8)) packed: team got a bye
+    'num_games',
+    'num_teams',
+])
+
+# Sample sets are a few bytes per simulation, so keeping a handful of leagues is cheap
+sample_cache = TTLCache(max_entries=int(os.environ.get('LEVERAGE_CACHE_SIZE', 32)), ttl=None)
+
+
+def run_outcome_chunk(inputs, size, seed_seq, playoff_teams, bye_teams, stored=None):
+    """
+    Simulate one chunk and return its packed (home_won, playoffs, byes) bits.
+
+    Draws are the ones run_chunk makes for the same seed. With `stored`, the
+    (path, first row) of this chunk in the sample store, they're read from
+    there instead.
+    """
+    with metrics.span('simulate', engine='leverage'):
+        if stored is not None:
+            home_points, away_points, home_won = load_scores(*stored, size)
+        else:
+            home_points, away_points, home_won = simulate_games(inputs, np.random.default_rng(seed_seq), size)
+        wins, points = season_totals(inputs, home_points, away_points, home_won)
+    with metrics.span('rank', engine='leverage'):
+        positions = rank_batch(wins, points, inputs.blocks)
+    with metrics.span('aggregate', engine='leverage'):
+        return (np.packbits(home_won.astype(bool), axis=1),
+                np.packbits(positions < playoff_teams, axis=1),
+                np.packbits(positions < bye_teams, axis=1))
+
+
+def combine_chunks(chunks, num_games, num_teams):
+    home_won, playoffs, byes = zip(*chunks)
+    return OutcomeSamples(np.concatenate(home_won), np.concatenate(playoffs), np.concatenate(byes),
+                          num_games, num_teams)
+
+
+def consistent_rows(samples, pinned):
+    """
+    Indices of the simulations matching every pinned result.
+
+    Parameters:
+    - pinned: dict of game index to True (home team won) or False (away team won)
+    """
+    rows = np.arange(len(samples.home_won))
+    for game, home_won in pinned.items():
+        if not 0 <= game < samples.num_games:
+            raise ValueError(f"Game {game} is not in the remaining schedule")
+        bits = samples.home_won[rows, game // 8] >> (7 - game % 8) & 1
+        rows = rows[bits == int(bool(home_won))]
+    return rows
+
+
+def outcome_counts(samples, rows):
+    """
+    Tally the given simulations.
+
+    Returns:
+    - playoff_count, bye_count: (teams,) playoff and bye appearances
+    - home_wins: (games,) simulations the home team won each game
+    - playoffs_if_home_won: (games, teams) playoff appearances in the
+      simulations the home team won each game
+    """
+    playoff_count = np.zeros(samples.num_teams, dtype=np.int64)
+    bye_count = np.zeros(samples.num_teams, dtype=np.int64)
+    home_wins = np.zeros(samples.num_games, dtype=np.int64)
+    playoffs_if_home_won = np.zeros((samples.num_games, samples.num_teams), dtype=np.int64)
+    # Unpacked a batch at a time to keep memory bounded
+    for first in range(0, len(rows), BATCH_SIZE):
+        batch = rows[first:first + BATCH_SIZE]
+        home_won = np.unpackbits(samples.home_won[batch], axis=1, count=samples.num_games)
+        playoffs = np.unpackbits(samples.playoffs[batch], axis=1, count=samples.num_teams)
+        byes = np.unpackbits(samples.byes[batch], axis=1, count=samples.num_teams)
+        playoff_count += playoffs.sum(axis=0, dtype=np.int64)
+        bye_count += byes.sum(axis=0, dtype=np.int64)
+        home_wins += home_won.sum(axis=0, dtype=np.int64)
+        playoffs_if_home_won += home_won.T.astype(np.int64) @ playoffs
+    return playoff_count, bye_count, home_wins, playoffs_if_home_won
+
+
+def conditional_odds(playoff_count, home_wins, playoffs_if_home_won, simulations):
+    """
+    Playoff odds of every team conditional on each side winning each game.
+
+    Returns:
+    - if_home_won, if_away_won: (games, teams) odds, NaN for a game whose
+      side never won in these simulations
+    """
+    away_wins = simulations - home_wins
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if_home_won = playoffs_if_home_won / home_wins[:, None]
+        if_away_won = (playoff_count - playoffs_if_home_won) / away_wins[:, None]
+    if_home_won[home_wins == 0] = np.nan
+    if_away_won[away_wins == 0] = np.nan
+    return if_home_won, if_away_won
@@ -0,0 +1,210 @@
+# Vectorized Monte Carlo engine for fantasy playoffs
+# - Draws every remaining game's scores for a batch of simulations at once
+# - Adds wins and points per team with matrix products against the schedule
+# - Ranks teams by wins, then points, with a row-wise lexsort
+
+from collections import namedtuple
+
+import numpy as np
+
+import metrics
+from Simulators.clinch import finish_blocks, finish_bounds
+
+# Simulations are drawn in batches of this many rows so memory stays bounded
+# (a 100k x 40 game batch of scores would otherwise be ~64MB per side)
+BATCH_SIZE = 10000
+
+SimInputs = namedtuple('SimInputs', [
+    'teams',        # team names, index i is column i of every array
+    'avg_ppg',      # (teams,) average points per game
+    'base_wins',    # (teams,) current wins
+    'base_points',  # (teams,) current points for
+    'home',         # (games,) home team index of each remaining game
+    'away',         # (games,) away team index of each remaining game
+    'sigma',        # league-wide standard deviation of a weekly score
+    'blocks',       # (start, team indices) groups from Simulators/clinch.py
+])
+
+
+def build_sim_inputs(league, std_dev=0.50):
+    """
+    Take the arrays the engine needs from a League.
+
+    Each team regresses toward its own points per game, and every weekly score
+    has the same spread: std_dev times the league average points per game.
+    """
+    avg_ppg = league.avg_ppg
+    base_wins = league.wins.astype(np.float64)
+    base_points = league.points.copy()
+    sigma = avg_ppg.mean() * std_dev
+
+    inputs = SimInputs(list(league.teams), avg_ppg, base_wins, base_points,
+                       league.home.copy(), league.away.copy(), sigma, None)
+    return inputs._replace(blocks=finish_blocks(*finish_bounds(inputs)))
+
+
+def schedule_matrices(inputs):
+    """
+    One-hot (games x teams) matrices mapping each game to its home and away team.
+    """
+    num_games = len(inputs.home)
+    num_teams = len(inputs.teams)
+    home_matrix = np.zeros((num_games, num_teams))
+    away_matrix = np.zeros((num_games, num_teams))
+    home_matrix[np.arange(num_games), inputs.home] = 1.0
+    away_matrix[np.arange(num_games), inputs.away] = 1.0
+    return home_matrix, away_matrix
+
+
+def simulate_batch(inputs, rng, size, matrices=None):
+    """
+    Simulate the rest of the season `size` times.
+
+    Returns:
+    - wins: (size, teams) final win totals
+    - points: (size, teams) final points for
+    """
+    return season_totals(inputs, *simulate_games(inputs, rng, size), matrices)
+
+
+def simulate_games(inputs, rng, size):
+    """
+    Draw every remaining game `size` times.
+
+    Returns:
+    - home_points, away_points: (size, games) scores
+    - home_won: (size, games) 1.0 where the home team won, else 0.0
+    """
+    num_games = len(inputs.home)
+
+    home_points = rng.normal(inputs.avg_ppg[inputs.home], inputs.sigma, size=(size, num_games))
+    away_points = rng.normal(inputs.avg_ppg[inputs.away], inputs.sigma, size=(size, num_games))
+
+    # Ensure points don't go negative
+    np.maximum(home_points, 0, out=home_points)
+    np.maximum(away_points, 0, out=away_points)
+
+    # Home team wins only on a strictly higher score, otherwise the away team does
+    home_won = (home_points > away_points).astype(np.float64)
+    return home_points, away_points, home_won
+
+
+def season_totals(inputs, home_points, away_points, home_won, matrices=None):
+    """
+    Final (size, teams) wins and points for simulated games.
+    """
+    home_matrix, away_matrix = matrices if matrices is not None else schedule_matrices(inputs)
+    wins = inputs.base_wins + home_won @ home_matrix + (1.0 - home_won) @ away_matrix
+    points = inputs.base_points + home_points @ home_matrix + away_points @ away_matrix
+    return wins, points
+
+
+def rank_batch(wins, points, blocks=None):
+    """
+    Finishing position (0 = first) of every team in every simulation.
+
+    Teams are ordered by most wins, then most points. Exact ties keep the
+    original team order, the same as a stable descending sort.
+
+    With `blocks` from the clinch pre-pass, only teams inside the same block
+    are ranked against each other; teams alone in a block have a fixed spot.
+    """
+    if blocks is None:
+        return rank_block(wins, points)
+
+    positions = np.empty(wins.shape, dtype=np.intp)
+    for start, members in blocks:
+        if len(members) == 1:
+            positions[:, members[0]] = start
+        else:
+            positions[:, members] = start + rank_block(wins[:, members], points[:, members])
+    return positions
+
+
+def rank_block(wins, points):
+    order = np.lexsort((-points, -wins), axis=-1)
+    positions = np.empty_like(order)
+    ranks = np.broadcast_to(np.arange(order.shape[1]), order.shape)
+    np.put_along_axis(positions, order, ranks, axis=1)
+    return positions
+
+
+def fixed_positions(blocks, size):
+    """
+    Positions for `size` simulations when the pre-pass has already settled every spot.
+    """
+    positions = np.empty(sum(len(members) for _, members in blocks), dtype=np.intp)
+    for start, members in blocks:
+        positions[members] = start
+    return np.broadcast_to(positions, (size, len(positions)))
+
+
+def tally_batch(positions, playoff_teams, bye_teams):
+    """
+    Per-team playoff count, bye count and finish position sum (1-based) for a batch.
+    """
+    playoff_count = np.count_nonzero(positions < playoff_teams, axis=0)
+    bye_count = np.count_nonzero(positions < bye_teams, axis=0)
+    finish_sum = positions.sum(axis=0) + positions.shape[0]
+    return playoff_count, bye_count, finish_sum
+
+
+def chunk_plan(num_simulations, seed=None, batch_size=BATCH_SIZE):
+    """
+    Split a run into fixed-size chunks, each with its own independent seed.
+
+    The split only depends on num_simulations and the seed, never on how many
+    workers run the chunks, so a seeded run is reproducible on any pool size.
+
+    Returns:
+    - list of (size, SeedSequence) pairs
+    """
+    sizes = [batch_size] * (num_simulations // batch_size)
+    if num_simulations % batch_size:
+        sizes.append(num_simulations % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return list(zip(sizes, seeds))
+
+
+def run_chunk(inputs, size, seed_seq, playoff_teams, bye_teams):
+    """
+    Simulate one chunk and return its (playoff_count, bye_count, finish_sum) counters.
+    """
+    if all(len(members) == 1 for _, members in inputs.blocks):
+        return tally_batch(fixed_positions(inputs.blocks, size), playoff_teams, bye_teams)
+
+    with metrics.span('simulate'):
+        rng = np.random.default_rng(seed_seq)
+        wins, points = simulate_batch(inputs, rng, size)
+    with metrics.span('rank'):
+        positions = rank_batch(wins, points, inputs.blocks)
+    with metrics.span('aggregate'):
+        return tally_batch(positions, playoff_teams, bye_teams)
+
+
+def accumulate_counts(plan, chunk_counts, num_teams):
+    """
+    Running totals over the chunks of a plan.
+
+    Yields:
+    - (simulations, playoff_count, bye_count, finish_sum) after each chunk,
+      with the counters summed over every chunk so far
+    """
+    playoff_count = np.zeros(num_teams, dtype=np.int64)
+    bye_count = np.zeros(num_teams, dtype=np.int64)
+    finish_sum = np.zeros(num_teams, dtype=np.int64)
+    simulations = 0
+    for (size, _), (chunk_playoff, chunk_bye, chunk_finish) in zip(plan, chunk_counts):
+        playoff_count += chunk_playoff
+        bye_count += chunk_bye
+        finish_sum += chunk_finish
+        simulations += size
+        yield simulations, playoff_count, bye_count, finish_sum
+
+
+def iter_chunks(inputs, plan, playoff_teams, bye_teams):
+    """
+    Yield each chunk's counters in plan order, simulating lazily in this process.
+    """
+    for size, seed_seq in plan:
+        yield run_chunk(inputs, size, seed_seq, playoff_teams, bye_teams)
@@ -0,0 +1,86 @@
+# Multi-core sharding of the Monte Carlo engine
+# - Chunks from chunk_plan are spread over a persistent process pool
+# - Every chunk carries its own SeedSequence, so results match the serial run
+
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from Simulators.monte_carlo import run_chunk
+
+MAX_WORKERS = os.cpu_count() or 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return the shared process pool of MAX_WORKERS processes, creating it on first use.
+
+    The pool is never replaced while the app runs, so concurrent runs can
+    keep submitting to it; each run limits its own chunks in flight instead
+    (see map_ordered). The executor only starts processes as work arrives.
+    Workers are spawned rather than forked because the pool is created from
+    inside Flask's request threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+@atexit.register
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def iter_chunks_parallel(inputs, plan, playoff_teams, bye_teams, workers=MAX_WORKERS):
+    """
+    Yield each chunk's counters in plan order, computed on the process pool.
+
+    The pool is shared between requests, so at most `workers` chunks are in
+    flight. Closing the generator early cancels the chunks not yet started.
+    """
+    calls = ((inputs, size, seed_seq, playoff_teams, bye_teams) for size, seed_seq in plan)
+    return map_ordered(run_chunk, calls, min(workers, len(plan)))
+
+
+def map_ordered(function, calls, workers=MAX_WORKERS):
+    """
+    Yield function(*arguments) for every argument tuple in `calls`, in order.
+
+    With more than one worker the calls run on the shared process pool, at
+    most `workers` at a time; otherwise they run lazily in this process.
+    Closing the generator early cancels the calls not yet started.
+    """
+    workers = max(1, min(workers, MAX_WORKERS))
+    if workers == 1:
+        for arguments in calls:
+            yield function(*arguments)
+        return
+
+    pool = get_pool()
+    pending = deque()
+    calls = iter(calls)
+    try:
+        for arguments in islice(calls, workers):
+            pending.append(pool.submit(function, *arguments))
+        while pending:
+            result = pending.popleft().result()
+            for arguments in islice(calls, 1):
+                pending.append(pool.submit(function, *arguments))
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,64 @@
+# Memoized simulation results
+# - Keyed by a canonical hash of everything that determines the odds
+#   (standings, schedule, playoff settings, std_dev, simulations, seed, ...)
+# - Size-bounded LRU in memory, optionally backed by a SQLite file so every
+#   Flask worker on a host reuses each other's results
+# - Configured from the environment:
+#   SIM_CACHE_SIZE (entries, default 1024), SIM_CACHE_DB (SQLite path, off by default),
+#   SIM_CACHE_DB_ROWS (rows kept in the SQLite file, oldest dropped first, default 100000)
+
+import hashlib
+import json
+import os
+
+import metrics
+from cache import SQLiteStore, TTLCache
+
+# Arguments that change how a result is computed but not the result itself
+IGNORED_ARGUMENTS = {'workers', 'progress'}
+
+
+def league_fingerprint(**arguments):
+    """
+    Canonical SHA-256 of simulation arguments.
+
+    Dict keys are sorted, so two equal standings hash the same however they
+    were built; list order (teams, schedule) is kept because it affects
+    seeded draws and tie order. A League hashes as its to_dict().
+    """
+    canonical = {name: value for name, value in arguments.items() if name not in IGNORED_ARGUMENTS}
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=lambda value: value.to_dict())
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def result_key(simulate, **arguments):
+    """
+    Cache key of simulate(**arguments), for callers that compute the result themselves.
+    """
+    return simulate.__name__, league_fingerprint(**arguments)
+
+
+def create_result_cache():
+    db_path = os.environ.get('SIM_CACHE_DB')
+    # Results come back from JSON as lists; callers unpack them like the original tuples.
+    # They never expire, so the file is bounded by row count instead of age.
+    store = SQLiteStore(db_path, table='simulation_results', decode=tuple,
+                        max_rows=int(os.environ.get('SIM_CACHE_DB_ROWS', 100000))) if db_path else None
+    return TTLCache(max_entries=int(os.environ.get('SIM_CACHE_SIZE', 1024)), ttl=None, store=store)
+
+
+result_cache = create_result_cache()
+
+
+def cached_call(simulate, **arguments):
+    """
+    Call simulate(**arguments), or return the result of an identical earlier call.
+
+    Returns:
+    - simulate's return value
+    - cache status: 'hit' or 'miss'
+    """
+    key = result_key(simulate, **arguments)
+    result, status = result_cache.get_or_load(key, lambda: simulate(**arguments))
+    metrics.increment('cache_requests_total', cache='result', status=status)
+    return result, status
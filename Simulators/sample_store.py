@@ -0,0 +1,237 @@
+# Persistent store of simulated scores, shared by every worker on a host
+# - A league's (2, simulations, games) home/away score matrix depends only on
+#   its standings, schedule, std_dev and seed, never on who asks or on the
+#   playoff settings, so it's drawn once and saved as a .npy file
+# - Later runs memory-map the file read-only: every process shares the OS
+#   page cache copy, and pool workers open it by path instead of receiving
+#   arrays. Different cutoffs, pins and conditional odds only re-rank it
+# - Scores are drawn from the chunk seeds of chunk_plan exactly as
+#   simulate_games does, so stored runs give the same odds as fresh ones
+# - Files are written under a temporary name and renamed into place, so a
+#   reader never sees a partial matrix; least recently used files are
+#   removed once the directory is over its size budget
+# - Configured from the environment:
+#   SAMPLE_STORE_DIR (directory, off by default), SAMPLE_STORE_MAX_MB (default 1024)
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import metrics
+from Simulators.monte_carlo import BATCH_SIZE, rank_batch, season_totals, simulate_games, tally_batch
+from Simulators.parallel_sim import map_ordered
+from Simulators.result_cache import league_fingerprint
+
+# Part of every key, so files written in an older layout are never read
+STORE_FORMAT = 1
+
+# Files used more recently than this (seconds) are never pruned, since a run
+# may still be reading them
+MIN_PRUNE_AGE = 60
+
+
+class SampleStore:
+    """
+    Directory of score matrices, one .npy file per key.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.npy')
+
+    def lookup(self, key):
+        """
+        Return the path of the stored matrix, or None if it isn't stored.
+        """
+        path = self.path(key)
+        try:
+            # Marks the file as recently used for prune()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def writer(self, key, shape):
+        return ScoreWriter(self, key, shape)
+
+    def prune(self):
+        """
+        Remove the least recently used files until the store fits its budget.
+
+        Files in use within the last MIN_PRUNE_AGE seconds are kept, even if
+        that leaves the store over budget for a while.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npy'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - MIN_PRUNE_AGE
+        for used_at, size, path in sorted(entries):
+            if total <= self.max_bytes or used_at > cutoff:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+class ScoreWriter:
+    """
+    Writable (2, simulations, games) memmap under a temporary name.
+
+    commit() renames it into place as the matrix for `key`; discard() (a
+    no-op after commit) removes it.
+    """
+
+    def __init__(self, store, key, shape):
+        self.store = store
+        self.key = key
+        fd, self.temp_path = tempfile.mkstemp(dir=store.directory, suffix='.tmp')
+        os.close(fd)
+        self.scores = np.lib.format.open_memmap(self.temp_path, mode='w+', dtype=np.float64, shape=shape)
+        self.committed = False
+
+    def commit(self):
+        self.scores.flush()
+        self.scores = None
+        os.replace(self.temp_path, self.store.path(self.key))
+        self.committed = True
+        self.store.prune()
+        return self.store.path(self.key)
+
+    def discard(self):
+        if not self.committed:
+            self.scores = None
+            os.unlink(self.temp_path)
+
+
+def create_sample_store():
+    directory = os.environ.get('SAMPLE_STORE_DIR')
+    if not directory:
+        return None
+    return SampleStore(directory, max_bytes=float(os.environ.get('SAMPLE_STORE_MAX_MB', 1024)) * 2 ** 20)
+
+
+sample_store = create_sample_store()
+
+
+def sample_key(league, std_dev, num_simulations, seed, batch_size=BATCH_SIZE):
+    """
+    Store key of a league's scores; playoff settings are left out because the
+    scores don't depend on them.
+    """
+    scoring = {name: value for name, value in league.to_dict().items()
+               if name not in ('playoff_teams', 'bye_teams')}
+    return league_fingerprint(format=STORE_FORMAT, std_dev=std_dev, num_simulations=num_simulations,
+                              seed=seed, batch_size=batch_size, **scoring)
+
+
+def storable(inputs):
+    """
+    Whether runs of this league should go through the store: it is enabled,
+    and the clinch pre-pass hasn't already settled every spot.
+    """
+    return (sample_store is not None and len(inputs.home) > 0
+            and any(len(members) > 1 for _, members in inputs.blocks))
+
+
+def chunk_starts(plan):
+    return np.cumsum([0] + [size for size, _ in plan[:-1]]).tolist()
+
+
+def load_scores(path, start, size):
+    """
+    (home_points, away_points, home_won) of rows start..start+size of a stored matrix.
+    """
+    scores = np.load(path, mmap_mode='r')
+    home_points = scores[0, start:start + size]
+    away_points = scores[1, start:start + size]
+    return home_points, away_points, (home_points > away_points).astype(np.float64)
+
+
+def tally_scores(inputs, home_points, away_points, home_won, playoff_teams, bye_teams):
+    with metrics.span('rank', engine='stored'):
+        wins, points = season_totals(inputs, home_points, away_points, home_won)
+        positions = rank_batch(wins, points, inputs.blocks)
+    with metrics.span('aggregate', engine='stored'):
+        return tally_batch(positions, playoff_teams, bye_teams)
+
+
+def run_stored_chunk(inputs, path, start, size, playoff_teams, bye_teams):
+    """
+    run_chunk over stored scores; returns the same counters for the same seed.
+    """
+    with metrics.span('load', engine='stored'):
+        scores = load_scores(path, start, size)
+    return tally_scores(inputs, *scores, playoff_teams, bye_teams)
+
+
+def write_scores(key, inputs, plan):
+    """
+    Draw every chunk in plan, store the scores under `key` and return the path.
+    """
+    num_simulations = sum(size for size, _ in plan)
+    writer = sample_store.writer(key, (2, num_simulations, len(inputs.home)))
+    try:
+        with metrics.span('simulate', engine='stored'):
+            for start, (size, seed_seq) in zip(chunk_starts(plan), plan):
+                home_points, away_points, _ = simulate_games(inputs, np.random.default_rng(seed_seq), size)
+                writer.scores[0, start:start + size] = home_points
+                writer.scores[1, start:start + size] = away_points
+        return writer.commit()
+    finally:
+        writer.discard()
+
+
+def stored_scores(key, inputs, plan):
+    """
+    Path of the stored score matrix for `key`, drawing and saving it first if needed.
+    """
+    path = sample_store.lookup(key)
+    metrics.increment('cache_requests_total', cache='samples', status='hit' if path else 'miss')
+    return path or write_scores(key, inputs, plan)
+
+
+def iter_chunks_stored(key, inputs, plan, playoff_teams, bye_teams, workers=1):
+    """
+    Yield each chunk's counters in plan order, from the stored scores for `key`.
+
+    A stored matrix is ranked on `workers` processes, each mapping the file.
+    On a miss with one worker the scores are drawn and saved chunk by chunk
+    as the run goes, so the first counters come as quickly as without the
+    store; closing the generator early then discards the partial file.
+    """
+    if workers > 1 or sample_store.lookup(key):
+        path = stored_scores(key, inputs, plan)
+        calls = ((inputs, path, start, size, playoff_teams, bye_teams)
+                 for start, (size, _) in zip(chunk_starts(plan), plan))
+        yield from map_ordered(run_stored_chunk, calls, min(workers, len(plan)))
+        return
+
+    metrics.increment('cache_requests_total', cache='samples', status='miss')
+    num_simulations = sum(size for size, _ in plan)
+    writer = sample_store.writer(key, (2, num_simulations, len(inputs.home)))
+    try:
+        for chunk, (start, (size, seed_seq)) in enumerate(zip(chunk_starts(plan), plan)):
+            with metrics.span('simulate', engine='stored'):
+                home_points, away_points, home_won = simulate_games(inputs, np.random.default_rng(seed_seq), size)
+                writer.scores[0, start:start + size] = home_points
+                writer.scores[1, start:start + size] = away_points
+            # Consumers stop pulling after the last chunk, so commit before handing it over
+            if chunk == len(plan) - 1:
+                writer.commit()
+            yield tally_scores(inputs, home_points, away_points, home_won, playoff_teams, bye_teams)
+    finally:
+        writer.discard()
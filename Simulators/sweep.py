@@ -0,0 +1,105 @@
+# Sensitivity sweeps over std_dev and playoff settings
+# - Common random numbers: every chunk draws its standard normal scores once
+#   and rescales them for each std_dev, so grid points differ only by the
+#   parameter, not by sampling noise
+# - Each std_dev is ranked once into a finish position histogram per team;
+#   every playoff and bye cutoff is read off its running total for free
+# - Draws come from the chunk seeds of chunk_plan in the order simulate_batch
+#   uses, so each grid point matches calculate_playoff_odds with that seed
+
+import numpy as np
+
+import metrics
+from Simulators.exact_sim import TIEBREAK_ROWS, finish_distribution
+from Simulators.monte_carlo import fixed_positions, rank_batch, schedule_matrices, season_totals
+
+
+def validate_grid(num_teams, std_devs, playoff_teams, bye_teams):
+    """
+    Raise ValueError unless every grid value is usable for a league of num_teams.
+    """
+    if not std_devs or not playoff_teams or not bye_teams:
+        raise ValueError("Every sweep axis needs at least one value")
+    if any(std_dev < 0 for std_dev in std_devs):
+        raise ValueError("std_dev values must be non-negative")
+    for name, cutoffs in (('playoff_teams', playoff_teams), ('bye_teams', bye_teams)):
+        if any(cutoff < 0 or cutoff > num_teams for cutoff in cutoffs):
+            raise ValueError(f"{name} values must be between 0 and {num_teams}")
+
+
+def finish_histogram(positions, num_teams):
+    """
+    (teams, positions) count of how often each team finished in each spot.
+    """
+    cells = np.arange(num_teams) * num_teams + positions
+    return np.bincount(cells.ravel(), minlength=num_teams * num_teams).reshape(num_teams, num_teams)
+
+
+def run_sweep_chunk(inputs, size, seed_seq, std_devs):
+    """
+    Simulate one chunk once and rank it under every std_dev.
+
+    Returns:
+    - (std_devs, teams, positions) finish position counts
+    """
+    num_teams = len(inputs.teams)
+    histograms = np.zeros((len(std_devs), num_teams, num_teams), dtype=np.int64)
+    if all(len(members) == 1 for _, members in inputs.blocks):
+        histograms[:] = finish_histogram(fixed_positions(inputs.blocks, size), num_teams)
+        return histograms
+
+    with metrics.span('simulate', engine='sweep'):
+        # rng.normal(mean, sigma) is mean + sigma * standard_normal, drawn in
+        # the same order, so these are the draws simulate_batch would make
+        rng = np.random.default_rng(seed_seq)
+        home_noise = rng.standard_normal((size, len(inputs.home)))
+        away_noise = rng.standard_normal((size, len(inputs.away)))
+        matrices = schedule_matrices(inputs)
+        home_mean = inputs.avg_ppg[inputs.home]
+        away_mean = inputs.avg_ppg[inputs.away]
+        league_ppg = inputs.avg_ppg.mean()
+
+    for i, std_dev in enumerate(std_devs):
+        with metrics.span('simulate', engine='sweep'):
+            sigma = league_ppg * std_dev
+            home_points = np.maximum(home_noise * sigma + home_mean, 0)
+            away_points = np.maximum(away_noise * sigma + away_mean, 0)
+            home_won = (home_points > away_points).astype(np.float64)
+            wins, points = season_totals(inputs, home_points, away_points, home_won, matrices)
+        with metrics.span('rank', engine='sweep'):
+            positions = rank_batch(wins, points, inputs.blocks)
+        with metrics.span('aggregate', engine='sweep'):
+            histograms[i] = finish_histogram(positions, num_teams)
+    return histograms
+
+
+def exact_finishes(inputs, std_devs, seed=None, rows=TIEBREAK_ROWS):
+    """
+    Exact (std_devs, teams, positions) finish probabilities, for short schedules,
+    with a tiebreak budget of `rows` per std_dev.
+    """
+    league_ppg = inputs.avg_ppg.mean()
+    return np.stack([finish_distribution(inputs._replace(sigma=league_ppg * std_dev), seed, rows)
+                     for std_dev in std_devs])
+
+
+def surface_from_histograms(histograms, playoff_teams, bye_teams):
+    """
+    Odds surfaces from finish position counts or probabilities.
+
+    Parameters:
+    - histograms: (std_devs, teams, positions) counts or probabilities of each
+      finish; the results are in the same units
+
+    Returns:
+    - playoff_prob: (std_devs, teams, len(playoff_teams))
+    - bye_prob: (std_devs, teams, len(bye_teams))
+    - average_finish: (std_devs, teams), 1-based
+    """
+    # at_or_above[..., k] is how often a team finished in the top k
+    at_or_above = np.concatenate([np.zeros(histograms.shape[:-1] + (1,)),
+                                  np.cumsum(histograms, axis=-1)], axis=-1)
+    positions = np.arange(1, histograms.shape[-1] + 1)
+    return (at_or_above[..., list(playoff_teams)],
+            at_or_above[..., list(bye_teams)],
+            histograms @ positions)
@@ -1,15 +1,29 @@
-from flask import Flask, render_template, request, jsonify
-from playoff_pred import calculate_playoff_odds
-from Fetchers.espn_fetch import fetch_espn
-from Fetchers.sleeper_fetch import fetch_sleeper_playoff_odds_data
-from Fetchers.csv_fetch import fetch_csv
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+from playoff_pred import calculate_clinch_status, calculate_playoff_odds, calculate_playoff_odds_adaptive, calculate_playoff_odds_analytic, calculate_playoff_odds_sweep, calculate_leverage, iter_playoff_odds
+from Simulators.analytic_sim import ANALYTIC_ERROR_BOUND
+from Simulators.parallel_sim import MAX_WORKERS
+from Simulators.result_cache import cached_call, league_fingerprint
+from Fetchers.registry import FETCHERS, SEASON_FETCHERS
+from Fetchers.csv_fetch import CSVFormatError, parse_csv
+from Fetchers.fetch_cache import cached_fetch, fetch_cache
+from jobs import JobQueueFull, job_manager
+from batch import MAX_LEAGUES, iter_batch, run_batch
+from season_store import odds_history, season_store, track_league
+import metrics
+import json
 import os
-from werkzeug.utils import secure_filename
 
-FETCHERS =  {
-    'espn': fetch_espn,
-    'sleeper': fetch_sleeper_playoff_odds_data
-}
+# Simulations between streamed snapshots; small enough that the first one
+# arrives in tens of milliseconds
+STREAM_SNAPSHOT_EVERY = 2000
+
+# Largest CSV upload, per file; uploads are parsed in memory, so bulk
+# schedules only need this raised
+CSV_MAX_UPLOAD_MB = float(os.environ.get('CSV_MAX_UPLOAD_MB', 1))
+
+# Sweep grid defaults and limits; every std_dev costs one ranking pass
+SWEEP_STD_DEVS = '30,40,50,60,70'
+SWEEP_MAX_STD_DEVS = 20
 
 app = Flask(__name__)
 
@@ -25,45 +39,421 @@ def get_league_data(source, league_id):
         return jsonify({'error': 'Unsupported source'}), 400
     
     # Get optional parameters from query string
+    params, error = read_simulation_params(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    metrics.increment('requests_total', endpoint='league', source=source)
+    with metrics.span('request', endpoint='league', source=source):
+        league, cache_status = cached_fetch(source, league_id, fetch_strategy)
+        if league is None:
+            return jsonify({'error': 'Failed to fetch league data'}), 502
+        
+        response = simulate_league(league, params)
+        response["cache"] = dict(fetch_cache.stats(), status=cache_status)
+        with metrics.span('serialize', endpoint='league'):
+            return jsonify(response)
+
+
+@app.route('/api/league/<source>/<int:league_id>/stream')
+def stream_league_odds(source, league_id):
+    """
+    Stream converging odds as Server-Sent Events.
+    
+    Sends a 'snapshot' event every `every` simulations (default 2000) and a
+    final 'done' event. Disconnecting stops the simulation.
+    """
+    fetch_strategy = FETCHERS.get(source)
+    if not fetch_strategy:
+        return jsonify({'error': 'Unsupported source'}), 400
+    
+    params, error = read_simulation_params(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    if params['precision'] is not None:
+        return jsonify({'error': 'Precision is not supported when streaming'}), 400
+    if params['mode'] == 'fast':
+        return jsonify({'error': 'Fast mode is not supported when streaming'}), 400
+    try:
+        snapshot_every = int(request.args.get('every', STREAM_SNAPSHOT_EVERY))
+    except ValueError:
+        return jsonify({'error': 'Invalid parameter format'}), 400
+    if snapshot_every < 100:
+        return jsonify({'error': 'Snapshots must be at least 100 simulations apart'}), 400
+    
+    league, cache_status = cached_fetch(source, league_id, fetch_strategy)
+    if league is None:
+        return jsonify({'error': 'Failed to fetch league data'}), 502
+    
+    snapshots = iter_playoff_odds(league,
+                                  num_simulations=params['num_simulations'],
+                                  std_dev=params['std_dev'],
+                                  seed=params['seed'],
+                                  workers=params['workers'],
+                                  snapshot_every=snapshot_every)
+    
+    def generate():
+        # The server closes this generator when the client goes away, which
+        # closes the simulation with it
+        try:
+            for simulations, (playoff_odds, bye_odds, average_finishes) in snapshots:
+                event = 'done' if simulations == params['num_simulations'] else 'snapshot'
+                data = json.dumps({
+                    "simulations": simulations,
+                    "num_simulations": params['num_simulations'],
+                    "playoff_odds": playoff_odds,
+                    "bye_odds": bye_odds,
+                    "average_finishes": average_finishes,
+                    "bye_teams": league.bye_teams,
+                    "playoff_teams": league.playoff_teams
+                })
+                yield f"event: {event}\ndata: {data}\n\n"
+        finally:
+            snapshots.close()
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def read_simulation_params(values):
+    """
+    Parse and validate the simulation settings shared by every endpoint.
+    
+    Returns:
+    - dict of num_simulations, std_dev, workers, seed, precision and mode
+      ('simulate', or 'fast' for the closed-form approximation), or None
+    - error message, or None
+    """
     try:
-        num_simulations = int(request.args.get('simulations', 50000))
-        std_dev = int(request.args.get('std_dev', 50)) / 100.0  # Convert percentage to decimal
+        num_simulations = int(values.get('simulations', 50000))
+        std_dev = int(values.get('std_dev', 50)) / 100.0  # Convert percentage to decimal
+        workers = int(values.get('workers', 1))
+        seed = values.get('seed')
+        seed = int(seed) if seed is not None else None
+        precision = values.get('precision')  # Target playoff odds CI half-width, in percent
+        precision = float(precision) / 100.0 if precision is not None else None
+        mode = values.get('mode', 'simulate')
         
         # Validate parameters
         if num_simulations < 1 or num_simulations > 100000:
-            return jsonify({'error': 'Simulations must be between 1 and 100,000'}), 400
+            return None, 'Simulations must be between 1 and 100,000'
         if std_dev < 0 or std_dev > 1.0:
-            return jsonify({'error': 'Standard deviation must be between 0 and 100%'}), 400
-    except ValueError:
-        return jsonify({'error': 'Invalid parameter format'}), 400
+            return None, 'Standard deviation must be between 0 and 100%'
+        if workers < 1 or workers > MAX_WORKERS:
+            return None, f'Workers must be between 1 and {MAX_WORKERS}'
+        if seed is not None and seed < 0:
+            return None, 'Seed must be a non-negative integer'
+        if precision is not None and (precision < 0.0005 or precision > 0.1):
+            return None, 'Precision must be between 0.05 and 10%'
+        if mode not in ('simulate', 'fast'):
+            return None, 'Mode must be simulate or fast'
+        if mode == 'fast' and precision is not None:
+            return None, 'Precision is not supported in fast mode'
+    except (TypeError, ValueError):
+        return None, 'Invalid parameter format'
     
-    current_wins, remaining_schedule, teams, playoff_teams, bye_teams = fetch_strategy(league_id)
+    return {
+        'num_simulations': num_simulations,
+        'std_dev': std_dev,
+        'workers': workers,
+        'seed': seed,
+        'precision': precision,
+        'mode': mode,
+    }, None
 
-    playoff_odds, bye_odds, average_finishes = calculate_playoff_odds(num_simulations=num_simulations, 
-                                                                      std_dev=std_dev,
-                                                                    schedule=remaining_schedule, 
-                                                                    teams=teams, 
-                                                                    current_wins=current_wins,
-                                                                    playoff_teams=playoff_teams, 
-                                                                    bye_teams=bye_teams)
-    print(f"Playoff odds: {playoff_odds}")
+
+def simulate_league(league, params, progress=None):
+    """
+    Simulate (or reuse the cached result for) a League and build the response body.
+    """
+    response = {}
+    if params['mode'] == 'fast':
+        playoff_odds, bye_odds, average_finishes = calculate_playoff_odds_analytic(league, std_dev=params['std_dev'])
+        result_status = None
+        response["error_bound"] = ANALYTIC_ERROR_BOUND
+    elif params['precision'] is not None:
+        (playoff_odds, bye_odds, average_finishes, achieved), result_status = cached_call(
+            calculate_playoff_odds_adaptive,
+            target_ci=params['precision'],
+            max_simulations=params['num_simulations'],
+            std_dev=params['std_dev'],
+            league=league,
+            seed=params['seed'],
+            workers=params['workers'],
+            progress=progress
+        )
+        response["precision"] = achieved
+    else:
+        (playoff_odds, bye_odds, average_finishes), result_status = cached_call(
+            calculate_playoff_odds,
+            num_simulations=params['num_simulations'],
+            std_dev=params['std_dev'],
+            league=league,
+            seed=params['seed'],
+            workers=params['workers'],
+            progress=progress
+        )
+    
+    with metrics.span('response'):
+        response["result_cache"] = result_status
+        response.update({
+            "mode": params['mode'],
+            "playoff_odds": playoff_odds, 
+            "bye_odds": bye_odds, 
+            "average_finishes": average_finishes,
+            "bye_teams": league.bye_teams,
+            "playoff_teams": league.playoff_teams
+        })
+    return response
+
+
+@app.route('/api/league/<source>/<int:league_id>/clinch')
+def get_clinch_status(source, league_id):
+    fetch_strategy = FETCHERS.get(source)
+    if not fetch_strategy:
+        return jsonify({'error': 'Unsupported source'}), 400
+    
+    league, cache_status = cached_fetch(source, league_id, fetch_strategy)
+    if league is None:
+        return jsonify({'error': 'Failed to fetch league data'}), 502
+    
+    clinch_status = calculate_clinch_status(league)
     return jsonify({
-        "playoff_odds": playoff_odds, 
-        "bye_odds": bye_odds, 
-        "average_finishes": average_finishes,
-        "bye_teams": bye_teams,
-        "playoff_teams": playoff_teams
+        "clinch_status": clinch_status,
+        "bye_teams": league.bye_teams,
+        "playoff_teams": league.playoff_teams,
+        "cache": dict(fetch_cache.stats(), status=cache_status)
     })
 
 
+@app.route('/api/league/<source>/<int:league_id>/sweep')
+def sweep_league_odds(source, league_id):
+    """
+    Playoff odds over a grid of std_dev and playoff settings, from one simulation.
+    
+    Takes comma-separated std_devs (percent), playoff_teams and bye_teams
+    (default: the league's own settings), plus the usual simulations, seed and
+    workers. Each team's playoff_odds are a [std_dev][playoff_teams] grid, its
+    bye_odds a [std_dev][bye_teams] grid and its average_finishes one value
+    per std_dev.
+    """
+    fetch_strategy = FETCHERS.get(source)
+    if not fetch_strategy:
+        return jsonify({'error': 'Unsupported source'}), 400
+    
+    params, error = read_simulation_params(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    if params['precision'] is not None:
+        return jsonify({'error': 'Precision is not supported in sweeps'}), 400
+    if params['mode'] == 'fast':
+        return jsonify({'error': 'Fast mode is not supported in sweeps'}), 400
+    try:
+        std_devs = [value / 100.0 for value in read_int_list(request.args.get('std_devs', SWEEP_STD_DEVS))]
+        playoff_teams = read_int_list(request.args.get('playoff_teams'))
+        bye_teams = read_int_list(request.args.get('bye_teams'))
+    except ValueError:
+        return jsonify({'error': 'Invalid parameter format'}), 400
+    if not std_devs or len(std_devs) > SWEEP_MAX_STD_DEVS:
+        return jsonify({'error': f'Between 1 and {SWEEP_MAX_STD_DEVS} std_devs per sweep'}), 400
+    if any(std_dev < 0 or std_dev > 1.0 for std_dev in std_devs):
+        return jsonify({'error': 'Standard deviation must be between 0 and 100%'}), 400
+    
+    metrics.increment('requests_total', endpoint='sweep', source=source)
+    with metrics.span('request', endpoint='sweep', source=source):
+        league, cache_status = cached_fetch(source, league_id, fetch_strategy)
+        if league is None:
+            return jsonify({'error': 'Failed to fetch league data'}), 502
+        
+        playoff_teams = playoff_teams or [league.playoff_teams]
+        bye_teams = bye_teams or [league.bye_teams]
+        try:
+            (playoff_odds, bye_odds, average_finishes), result_status = cached_call(
+                calculate_playoff_odds_sweep,
+                league=league,
+                std_devs=std_devs,
+                playoff_teams=playoff_teams,
+                bye_teams=bye_teams,
+                num_simulations=params['num_simulations'],
+                seed=params['seed'],
+                workers=params['workers']
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            "std_devs": std_devs,
+            "playoff_teams": playoff_teams,
+            "bye_teams": bye_teams,
+            "playoff_odds": playoff_odds,
+            "bye_odds": bye_odds,
+            "average_finishes": average_finishes,
+            "result_cache": result_status,
+            "cache": dict(fetch_cache.stats(), status=cache_status)
+        })
+
+
+@app.route('/api/league/<source>/<int:league_id>/leverage')
+def get_leverage(source, league_id):
+    """
+    Every team's playoff odds if either side wins each remaining game.
+    
+    Takes the usual simulations, std_dev, seed and workers, plus any number
+    of pin=<game>:<home|away> to fix results first; game is the index into
+    the remaining schedule, as listed in the response. Repeated queries for
+    the same league and settings reuse the same simulated seasons.
+    """
+    fetch_strategy = FETCHERS.get(source)
+    if not fetch_strategy:
+        return jsonify({'error': 'Unsupported source'}), 400
+    
+    params, error = read_simulation_params(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    if params['precision'] is not None:
+        return jsonify({'error': 'Precision is not supported for leverage'}), 400
+    if params['mode'] == 'fast':
+        return jsonify({'error': 'Fast mode is not supported for leverage'}), 400
+    pinned = {}
+    for pin in request.args.getlist('pin'):
+        game, _, winner = pin.partition(':')
+        if not game.isdigit() or winner not in ('home', 'away'):
+            return jsonify({'error': 'Pins must look like <game>:home or <game>:away'}), 400
+        pinned[int(game)] = winner == 'home'
+    
+    metrics.increment('requests_total', endpoint='leverage', source=source)
+    with metrics.span('request', endpoint='leverage', source=source):
+        league, cache_status = cached_fetch(source, league_id, fetch_strategy)
+        if league is None:
+            return jsonify({'error': 'Failed to fetch league data'}), 502
+        
+        try:
+            leverage = calculate_leverage(league,
+                                          num_simulations=params['num_simulations'],
+                                          std_dev=params['std_dev'],
+                                          seed=params['seed'],
+                                          workers=params['workers'],
+                                          pinned=pinned)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify(dict(leverage,
+                            pinned={game: 'home' if home_won else 'away' for game, home_won in pinned.items()},
+                            bye_teams=league.bye_teams,
+                            playoff_teams=league.playoff_teams,
+                            cache=dict(fetch_cache.stats(), status=cache_status)))
+
+
+@app.route('/api/league/<source>/<int:league_id>/track')
+def track_league_odds(source, league_id):
+    """
+    Refresh a tracked league and return this week's playoff odds.
+    
+    Only standings and matchups of weeks not seen before are fetched, and the
+    odds are simulated only if the league changed since they were last saved
+    for these simulations, std_dev and seed. Every refresh adds to the
+    league's history.
+    """
+    fetch_season = SEASON_FETCHERS.get(source)
+    if not fetch_season:
+        return jsonify({'error': 'Unsupported source'}), 400
+    if season_store is None:
+        return jsonify({'error': 'Season tracking is not enabled'}), 503
+    
+    params, error = read_simulation_params(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    if params['precision'] is not None:
+        return jsonify({'error': 'Precision is not supported when tracking'}), 400
+    if params['mode'] == 'fast':
+        return jsonify({'error': 'Fast mode is not supported when tracking'}), 400
+    
+    metrics.increment('requests_total', endpoint='track', source=source)
+    with metrics.span('request', endpoint='track', source=source):
+        tracked = track_league(source, league_id, fetch_season,
+                               num_simulations=params['num_simulations'],
+                               std_dev=params['std_dev'],
+                               seed=params['seed'],
+                               workers=params['workers'])
+        if tracked is None:
+            return jsonify({'error': 'Failed to fetch league data'}), 502
+        
+        league = tracked['league']
+        playoff_odds, bye_odds, average_finishes = tracked['odds']
+        return jsonify({
+            "week": tracked['week'],
+            "new_weeks": tracked['new_weeks'],
+            "league_changed": tracked['changed'],
+            "odds_status": tracked['odds_status'],
+            "playoff_odds": playoff_odds,
+            "bye_odds": bye_odds,
+            "average_finishes": average_finishes,
+            "bye_teams": league.bye_teams,
+            "playoff_teams": league.playoff_teams
+        })
+
+
+@app.route('/api/league/<source>/<int:league_id>/history')
+def get_league_history(source, league_id):
+    """
+    Weekly playoff odds saved by /track for the same simulations, std_dev
+    and seed, oldest first. Takes an optional season (default: this year);
+    nothing is fetched or simulated.
+    """
+    if source not in SEASON_FETCHERS:
+        return jsonify({'error': 'Unsupported source'}), 400
+    if season_store is None:
+        return jsonify({'error': 'Season tracking is not enabled'}), 503
+    
+    params, error = read_simulation_params(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    if params['mode'] == 'fast':
+        return jsonify({'error': 'Fast mode odds are not tracked'}), 400
+    try:
+        season = int(request.args['season']) if 'season' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'Invalid parameter format'}), 400
+    
+    history = odds_history(source, league_id,
+                           num_simulations=params['num_simulations'],
+                           std_dev=params['std_dev'],
+                           seed=params['seed'],
+                           season=season)
+    return jsonify({"history": history})
+
+
+def read_int_list(value):
+    """
+    Parse a comma-separated list of integers; None or '' gives an empty list.
+    """
+    if not value:
+        return []
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
 @app.route('/api/upload-csv', methods=['POST'])
 def upload_csv():
-    MAX_FILE_SIZE = 1 * 1024 * 1024  # 1MB max
-    ALLOWED_EXTENSIONS = {'csv'}
+    upload, error_response = load_csv_upload()
+    if error_response:
+        return error_response
+    
+    try:
+        return jsonify(simulate_league(upload['league'], upload['params']))
+    except Exception as e:
+        return jsonify({'error': 'Invalid CSV format or parsing error'}), 400
+
+
+def load_csv_upload():
+    """
+    Validate and parse an uploaded teams/schedule CSV pair and its form settings.
     
-    # Ensure Fetchers/resources directory exists
-    resources_dir = os.path.join(os.path.dirname(__file__), 'Fetchers', 'resources')
-    os.makedirs(resources_dir, exist_ok=True)
+    Returns:
+    - dict with the parsed 'league' (a League) and simulation 'params', or None
+    - error response, or None
+    """
+    MAX_FILE_SIZE = CSV_MAX_UPLOAD_MB * 1024 * 1024
+    ALLOWED_EXTENSIONS = {'csv'}
     
     # Get uploaded files and playoff settings
     teams_file = request.files.get('teams_file')
@@ -72,20 +462,12 @@ def upload_csv():
     bye_teams = int(request.form.get('bye_teams', 2))
     
     # Get optional parameters
-    try:
-        num_simulations = int(request.form.get('simulations', 50000))
-        std_dev = int(request.form.get('std_dev', 50)) / 100.0  # Convert percentage to decimal
-        
-        # Validate parameters
-        if num_simulations < 1 or num_simulations > 100000:
-            return jsonify({'error': 'Simulations must be between 1 and 100,000'}), 400
-        if std_dev < 0 or std_dev > 1.0:
-            return jsonify({'error': 'Standard deviation must be between 0 and 100%'}), 400
-    except ValueError:
-        return jsonify({'error': 'Invalid parameter format'}), 400
+    params, error = read_simulation_params(request.form)
+    if error:
+        return None, (jsonify({'error': error}), 400)
     
     if not teams_file or not schedule_file:
-        return jsonify({'error': 'Both files are required'}), 400
+        return None, (jsonify({'error': 'Both files are required'}), 400)
     
     # Helper function to check file extension
     def allowed_file(filename):
@@ -93,7 +475,7 @@ def upload_csv():
     
     # Validate file extensions
     if not allowed_file(teams_file.filename) or not allowed_file(schedule_file.filename):
-        return jsonify({'error': 'Only CSV files allowed'}), 400
+        return None, (jsonify({'error': 'Only CSV files allowed'}), 400)
     
     # Check file sizes
     teams_file.seek(0, os.SEEK_END)
@@ -105,76 +487,162 @@ def upload_csv():
     schedule_file.seek(0)
     
     if teams_size > MAX_FILE_SIZE or schedule_size > MAX_FILE_SIZE:
-        return jsonify({'error': 'Files must be under 1MB'}), 400
+        return None, (jsonify({'error': f'Files must be under {CSV_MAX_UPLOAD_MB:g}MB'}), 400)
     
     if teams_size == 0 or schedule_size == 0:
-        return jsonify({'error': 'Files cannot be empty'}), 400
-    
-    # Validate CSV content by checking headers
-    def validate_csv_content(file, expected_headers):
-        try:
-            first_line = file.readline().decode('utf-8', errors='ignore').strip()
-            file.seek(0)
-            
-            # Check if expected headers are present
-            for header in expected_headers:
-                if header not in first_line:
-                    return False, f"Missing required header: {header}"
-            return True, None
-        except Exception as e:
-            return False, f"Error reading file: {str(e)}"
-    
-    # Validate teams file has required headers
-    teams_valid, teams_error = validate_csv_content(teams_file, ['team_name', 'wins', 'losses', 'points_for'])
-    if not teams_valid:
-        return jsonify({'error': f'Invalid teams file: {teams_error}'}), 400
-    
-    # Validate schedule file has required headers
-    schedule_valid, schedule_error = validate_csv_content(schedule_file, ['home_team', 'away_team'])
-    if not schedule_valid:
-        return jsonify({'error': f'Invalid schedule file: {schedule_error}'}), 400
+        return None, (jsonify({'error': 'Files cannot be empty'}), 400)
     
     try:
-        # Use secure_filename to sanitize filenames
-        teams_filename = secure_filename(teams_file.filename)
-        schedule_filename = secure_filename(schedule_file.filename)
-        
-        teams_path = os.path.join(resources_dir, teams_filename)
-        schedule_path = os.path.join(resources_dir, schedule_filename)
-        
-        teams_file.save(teams_path)
-        schedule_file.save(schedule_path)
-        
-        # Fetch and calculate
-        current_wins, remaining_schedule, teams = fetch_csv(teams_path, schedule_path)
+        # Parse straight from the upload streams; headers are checked as they're read
+        league = parse_csv(teams_file.stream, schedule_file.stream, playoff_teams, bye_teams,
+                           team_name=f'Teams file ({teams_file.filename})',
+                           schedule_name=f'Schedule file ({schedule_file.filename})')
         
         # Validate playoff settings
-        total_teams = len(teams)
+        total_teams = league.num_teams
         if playoff_teams > total_teams:
-            return jsonify({'error': f'Playoff teams ({playoff_teams}) cannot exceed total teams ({total_teams})'}), 400
+            return None, (jsonify({'error': f'Playoff teams ({playoff_teams}) cannot exceed total teams ({total_teams})'}), 400)
         
         if bye_teams >= playoff_teams:
-            return jsonify({'error': f'Bye teams ({bye_teams}) must be less than playoff teams ({playoff_teams})'}), 400
-        
-        playoff_odds, bye_odds, average_finishes = calculate_playoff_odds(
-            num_simulations=num_simulations, 
-            std_dev=std_dev,
-            schedule=remaining_schedule, 
-            teams=teams, 
-            current_wins=current_wins,
-            playoff_teams=playoff_teams,
-            bye_teams=bye_teams
-        )
+            return None, (jsonify({'error': f'Bye teams ({bye_teams}) must be less than playoff teams ({playoff_teams})'}), 400)
         
+        return {
+            'league': league,
+            'params': params,
+        }, None
+    except CSVFormatError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+    except Exception as e:
+        return None, (jsonify({'error': 'Invalid CSV format or parsing error'}), 400)
+
+@app.route('/api/jobs', methods=['POST'])
+def create_league_job():
+    body = request.get_json(silent=True) or {}
+    source = body.get('source')
+    fetch_strategy = FETCHERS.get(source)
+    if not fetch_strategy:
+        return jsonify({'error': 'Unsupported source'}), 400
+    try:
+        league_id = int(body.get('league_id'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid league ID'}), 400
+    
+    params, error = read_simulation_params(body)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    def run(job):
+        league, cache_status = cached_fetch(source, league_id, fetch_strategy)
+        if league is None:
+            raise ValueError('Failed to fetch league data')
+        response = simulate_league(league, params, progress=job.report)
+        response["cache"] = dict(fetch_cache.stats(), status=cache_status)
+        return response
+    
+    return submit_job(('league', source, league_id, league_fingerprint(**params)), run)
+
+
+@app.route('/api/jobs/upload-csv', methods=['POST'])
+def create_csv_job():
+    upload, error_response = load_csv_upload()
+    if error_response:
+        return error_response
+    
+    def run(job):
+        return simulate_league(upload['league'], upload['params'], progress=job.report)
+    
+    return submit_job(('csv', league_fingerprint(**upload)), run)
+
+
+def submit_job(key, run):
+    try:
+        job, created = job_manager.submit(key, run)
+    except JobQueueFull:
+        return jsonify({'error': 'Too many simulations queued, try again shortly'}), 503
+    return jsonify(dict(job.to_dict(), deduplicated=not created)), 202
+
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/batch', methods=['POST'])
+def batch_league_odds():
+    """
+    Playoff odds for many leagues in one request.
+    
+    Expects {"leagues": [{"source", "league_id", "simulations", "std_dev",
+    "seed"}, ...], "workers": 1}. Responds with {"results": [...]} in request
+    order, or with ?format=ndjson one JSON line per league as it finishes.
+    A league that fails gets an "error" entry; the others still run.
+    """
+    body = request.get_json(silent=True) or {}
+    leagues = body.get('leagues')
+    if not isinstance(leagues, list) or not leagues:
+        return jsonify({'error': 'Expected a non-empty list of leagues'}), 400
+    if len(leagues) > MAX_LEAGUES:
+        return jsonify({'error': f'At most {MAX_LEAGUES} leagues per batch'}), 400
+    try:
+        workers = int(body.get('workers', 1))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid parameter format'}), 400
+    if workers < 1 or workers > MAX_WORKERS:
+        return jsonify({'error': f'Workers must be between 1 and {MAX_WORKERS}'}), 400
+    
+    entries = [read_batch_entry(entry) for entry in leagues]
+    metrics.increment('requests_total', endpoint='batch', source='batch')
+    if request.args.get('format') == 'ndjson':
+        lines = (json.dumps(result) + '\n' for result in iter_batch(entries, workers))
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+    
+    with metrics.span('request', endpoint='batch', source='batch'):
+        results = run_batch(entries, workers)
         return jsonify({
-            "playoff_odds": playoff_odds, 
-            "bye_odds": bye_odds, 
-            "average_finishes": average_finishes,
-            "bye_teams": bye_teams,
-            "playoff_teams": playoff_teams
+            'results': results,
+            'errors': sum('error' in result for result in results)
         })
-    except Exception as e:
-        return jsonify({'error': 'Invalid CSV format or parsing error'}), 400
+
+
+def read_batch_entry(entry):
+    """
+    Validate one league of a batch request.
+    
+    Returns:
+    - source, league_id, and the simulation params or an error message
+    """
+    if not isinstance(entry, dict):
+        return None, None, 'Each league must be an object'
+    source = entry.get('source')
+    try:
+        league_id = int(entry.get('league_id'))
+    except (TypeError, ValueError):
+        return source, entry.get('league_id'), 'Invalid league ID'
+    params, error = read_simulation_params(entry)
+    if error:
+        return source, league_id, error
+    if params['precision'] is not None:
+        return source, league_id, 'Precision is not supported in batches'
+    if params['mode'] == 'fast':
+        return source, league_id, 'Fast mode is not supported in batches'
+    return source, league_id, params
+
+
+@app.route('/metrics')
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,125 @@
+# Playoff odds for many leagues in one call
+# - Fetches every league concurrently through the fetch cache
+# - Reuses cached results, then simulates the rest together with the packed
+#   engine (see calculate_playoff_odds_batch)
+# - Every league succeeds or fails on its own: a bad league id or a failed
+#   fetch comes back as that league's error and never fails the batch
+# - Configured from the environment:
+#   BATCH_FETCH_CONCURRENCY (default 16), BATCH_MAX_LEAGUES (default 1000)
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+from Fetchers.fetch_cache import cached_fetch
+from Fetchers.registry import FETCHERS
+from Simulators.result_cache import result_cache, result_key
+from playoff_pred import calculate_playoff_odds, iter_playoff_odds_batch
+
+FETCH_CONCURRENCY = int(os.environ.get('BATCH_FETCH_CONCURRENCY', 16))
+MAX_LEAGUES = int(os.environ.get('BATCH_MAX_LEAGUES', 1000))
+
+fetch_executor = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix='batch-fetch')
+
+
+def run_batch(entries, workers=1):
+    """
+    Playoff odds for every (source, league_id, params) entry, in order.
+
+    See iter_batch for the parameters and the shape of each result.
+    """
+    results = [None] * len(entries)
+    for result in iter_batch(entries, workers):
+        results[result['index']] = result
+    return results
+
+
+def iter_batch(entries, workers=1):
+    """
+    Playoff odds for many leagues, yielded as each one finishes.
+
+    Parameters:
+    - entries: list of (source, league_id, params); params is a dict of
+      num_simulations, std_dev and seed (as from read_simulation_params in
+      app.py), or an error message when the entry's parameters were invalid
+    - workers: processes to spread the simulations over
+
+    Yields:
+    - dict per entry with its 'index', 'source' and 'league_id', plus either
+      'error', or the odds, playoff settings and cache statuses the single
+      league endpoint returns
+    """
+    def fetch(source, league_id):
+        return cached_fetch(source, league_id, FETCHERS[source])
+
+    # Fetch every valid entry at once; invalid ones fail straight away
+    futures = {}
+    for index, (source, league_id, params) in enumerate(entries):
+        if isinstance(params, str):
+            yield error_result(index, source, league_id, params)
+        elif source not in FETCHERS:
+            yield error_result(index, source, league_id, 'Unsupported source')
+        else:
+            futures[fetch_executor.submit(fetch, source, league_id)] = index
+
+    leagues = []  # (index, League, fetch status, result cache key)
+    for future in as_completed(futures):
+        index = futures[future]
+        source, league_id, params = entries[index]
+        try:
+            league, cache_status = future.result()
+        except Exception as e:
+            yield error_result(index, source, league_id, f'Failed to fetch league data: {e}')
+            continue
+        if league is None:
+            yield error_result(index, source, league_id, 'Failed to fetch league data')
+            continue
+
+        key = result_key(calculate_playoff_odds,
+                         num_simulations=params['num_simulations'],
+                         std_dev=params['std_dev'],
+                         league=league,
+                         seed=params['seed'])
+        odds = result_cache.get(key)
+        metrics.increment('cache_requests_total', cache='result', status='hit' if odds is not None else 'miss')
+        if odds is not None:
+            yield odds_result(index, entries[index], league, odds, 'hit', cache_status)
+        else:
+            leagues.append((index, league, cache_status, key))
+
+    batch = [{
+        'league': league,
+        'num_simulations': entries[index][2]['num_simulations'],
+        'std_dev': entries[index][2]['std_dev'],
+        'seed': entries[index][2]['seed'],
+    } for index, league, _, _ in leagues]
+    for row, odds, error in iter_playoff_odds_batch(batch, workers):
+        index, league, cache_status, key = leagues[row]
+        source, league_id, _ = entries[index]
+        if error:
+            yield error_result(index, source, league_id, error)
+            continue
+        result_cache.set(key, odds)
+        yield odds_result(index, entries[index], league, odds, 'miss', cache_status)
+
+
+def error_result(index, source, league_id, error):
+    metrics.increment('batch_errors_total', source=source)
+    return {'index': index, 'source': source, 'league_id': league_id, 'error': error}
+
+
+def odds_result(index, entry, league, odds, result_status, cache_status):
+    source, league_id, _ = entry
+    playoff_odds, bye_odds, average_finishes = odds
+    return {
+        'index': index,
+        'source': source,
+        'league_id': league_id,
+        'playoff_odds': playoff_odds,
+        'bye_odds': bye_odds,
+        'average_finishes': average_finishes,
+        'playoff_teams': league.playoff_teams,
+        'bye_teams': league.bye_teams,
+        'result_cache': result_status,
+        'cache': cache_status,
+    }
@@ -0,0 +1,53 @@
+# Compare two benchmark result files
+# - Matches cases by name and reports the p50 latency change
+# - Exits non-zero when any case slowed down by more than the threshold,
+#   so it can gate a commit
+#
+# Usage: python -m benchmarks.compare baseline.json candidate.json [--threshold 0.10]
+
+import argparse
+import json
+import sys
+
+
+def load_cases(path):
+    with open(path) as f:
+        results = json.load(f)
+    return results['meta'], {case['name']: case for case in results['simulator'] + results['fetchers']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark runs.')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative p50 slowdown that counts as a regression (default 0.10)')
+    args = parser.parse_args()
+
+    baseline_meta, baseline = load_cases(args.baseline)
+    candidate_meta, candidate = load_cases(args.candidate)
+    print(f"baseline {baseline_meta.get('commit')}  ->  candidate {candidate_meta.get('commit')}\n")
+
+    regressions = []
+    for name, case in candidate.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]['latency']['p50']
+        after = case['latency']['p50']
+        change = (after - before) / before
+        flag = ''
+        if change > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:<40} {before * 1000:9.2f}ms -> {after * 1000:9.2f}ms  {change:+7.1%}{flag}")
+
+    missing = sorted(set(baseline) - set(candidate))
+    if missing:
+        print(f"\nNot in candidate: {', '.join(missing)}")
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
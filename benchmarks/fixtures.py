@@ -0,0 +1,223 @@
+# Recorded API responses for benchmarking the fetchers offline
+# - One JSON file per source mapping a route to the response body, in the
+#   shape the Sleeper and ESPN APIs return (trimmed to the fields the
+#   fetchers and espn_api read)
+# - Generated from a synthetic league; regenerate with
+#   python -m benchmarks.fixtures
+# - FixtureServer replays them over local HTTP, optionally with added
+#   latency to stand in for the real network
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from benchmarks.synthetic import REGULAR_SEASON_WEEKS, standings, synthetic_season
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+FIXTURE_LEAGUE_ID = 1000
+FIXTURE_TEAMS = 12
+FIXTURE_REMAINING_WEEKS = 4
+PLAYOFF_TEAMS = 6
+PLAYOFF_WEEKS = 3
+
+
+def sleeper_fixtures(teams, weeks, scores):
+    """
+    Responses for /league/<id>, /users, /rosters and /matchups/<week>.
+    """
+    current_wins = standings(teams, weeks, scores)
+    roster_ids = {team: i + 1 for i, team in enumerate(teams)}
+    users = [{'user_id': str(9000 + i), 'display_name': team} for i, team in enumerate(teams)]
+    rosters = []
+    for i, team in enumerate(teams):
+        wins, losses, ties, points = current_wins[team]
+        rosters.append({
+            'roster_id': roster_ids[team],
+            'owner_id': str(9000 + i),
+            'settings': {'wins': wins, 'losses': losses, 'ties': ties,
+                         'fpts': int(points), 'fpts_decimal': round(points % 1 * 100)},
+            'metadata': {'record': 'W' * len(scores)},
+        })
+    
+    routes = {
+        'league': {'league_id': str(FIXTURE_LEAGUE_ID),
+                   'settings': {'playoff_week_start': REGULAR_SEASON_WEEKS + 1,
+                                'playoff_teams': PLAYOFF_TEAMS,
+                                'playoff_byes': 2}},
+        'users': users,
+        'rosters': rosters,
+    }
+    for week_number, week in enumerate(weeks, start=1):
+        routes[f'matchups/{week_number}'] = [
+            {'roster_id': roster_ids[team], 'matchup_id': matchup_id}
+            for matchup_id, game in enumerate(week, start=1)
+            for team in game
+        ]
+    return routes
+
+
+def espn_fixtures(teams, weeks, scores):
+    """
+    Responses for the league document, pro players and pro schedules.
+    """
+    current_wins = standings(teams, weeks, scores)
+    team_ids = {team: i + 1 for i, team in enumerate(teams)}
+    schedule = []
+    for week_number, week in enumerate(weeks, start=1):
+        for game_index, (home, away) in enumerate(week):
+            home_points, away_points = scores[week_number - 1][game_index] if week_number <= len(scores) else (0, 0)
+            if week_number > len(scores):
+                winner = 'UNDECIDED'
+            elif home_points == away_points:
+                winner = 'TIE'
+            else:
+                winner = 'HOME' if home_points > away_points else 'AWAY'
+            schedule.append({
+                'matchupPeriodId': week_number,
+                'home': {'teamId': team_ids[home], 'totalPoints': home_points},
+                'away': {'teamId': team_ids[away], 'totalPoints': away_points},
+                'winner': winner,
+            })
+    
+    espn_teams = []
+    for team in teams:
+        wins, losses, ties, points = current_wins[team]
+        espn_teams.append({
+            'id': team_ids[team],
+            'abbrev': team[:4].upper() + team[-2:],
+            'name': team,
+            'divisionId': 0,
+            'playoffSeed': 0,
+            'record': {'overall': {'wins': wins, 'losses': losses, 'ties': ties,
+                                   'pointsFor': points, 'pointsAgainst': 0.0,
+                                   'streakLength': 0, 'streakType': 'NONE'}},
+        })
+    
+    current_week = len(scores) + 1
+    league = {
+        'seasonId': 0,
+        'scoringPeriodId': current_week,
+        'status': {'currentMatchupPeriod': current_week,
+                   'firstScoringPeriod': 1,
+                   'finalScoringPeriod': REGULAR_SEASON_WEEKS + PLAYOFF_WEEKS,
+                   'latestScoringPeriod': current_week,
+                   'previousSeasons': []},
+        'settings': {
+            'name': 'Benchmark League',
+            'size': len(teams),
+            'scheduleSettings': {'matchupPeriodCount': REGULAR_SEASON_WEEKS,
+                                 'matchupPeriods': {},
+                                 'playoffTeamCount': PLAYOFF_TEAMS,
+                                 'playoffMatchupPeriodLength': 1,
+                                 'playoffSeedingRule': 'TOTAL_POINTS_SCORED'},
+            'tradeSettings': {'vetoVotesRequired': 0},
+            'draftSettings': {'keeperCount': 0},
+            'scoringSettings': {'matchupTieRule': 'NONE', 'playoffMatchupTieRule': 'NONE'},
+            'acquisitionSettings': {'isUsingAcquisitionBudget': False},
+            'rosterSettings': {'lineupSlotCounts': {}},
+        },
+        'teams': espn_teams,
+        'schedule': schedule,
+        'members': [],
+        'draftDetail': {'drafted': False},
+    }
+    return {
+        'league': league,
+        'players': [],
+        'pro_schedule': {'settings': {'proTeams': []}},
+    }
+
+
+FIXTURE_BUILDERS = {
+    'sleeper': sleeper_fixtures,
+    'espn': espn_fixtures,
+}
+
+
+def write_fixtures(directory=FIXTURES_DIR):
+    season = synthetic_season(FIXTURE_TEAMS, FIXTURE_REMAINING_WEEKS)
+    os.makedirs(directory, exist_ok=True)
+    for source, build in FIXTURE_BUILDERS.items():
+        with open(os.path.join(directory, f'{source}.json'), 'w') as f:
+            json.dump(build(*season), f, indent=1, sort_keys=True)
+
+
+def load_fixtures(source, directory=FIXTURES_DIR):
+    with open(os.path.join(directory, f'{source}.json')) as f:
+        return json.load(f)
+
+
+def sleeper_route(path):
+    # league/<id>[/users | /rosters | /matchups/<week>]
+    parts = path.strip('/').split('/')[2:]
+    return '/'.join(parts) or 'league'
+
+
+def espn_route(path):
+    # apis/v3/games/ffl/seasons/<year>[/segments/0/leagues/<id> | /players]
+    if path.endswith('/players'):
+        return 'players'
+    if '/leagues/' in path:
+        return 'league'
+    return 'pro_schedule'
+
+
+ROUTERS = {
+    'sleeper': sleeper_route,
+    'espn': espn_route,
+}
+
+
+class FixtureServer:
+    """
+    Serve recorded responses for every source on a local port.
+
+    Use as a context manager; `url(source)` is the base URL to point that
+    source's fetcher at.
+    """
+
+    def __init__(self, latency=0.0, directory=FIXTURES_DIR):
+        fixtures = {source: load_fixtures(source, directory) for source in ROUTERS}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out as separate writes; without this, Nagle's
+            # algorithm stalls keep-alive clients on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                time.sleep(latency)
+                source, _, path = urlparse(self.path).path.lstrip('/').partition('/')
+                body = fixtures.get(source, {}).get(ROUTERS[source](path)) if source in ROUTERS else None
+                encoded = json.dumps(body).encode('utf-8')
+                self.send_response(200 if body is not None else 404)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def url(self, source):
+        return f'http://127.0.0.1:{self._server.server_address[1]}/{source}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == '__main__':
+    write_fixtures()
+    print(f'Wrote fixtures to {FIXTURES_DIR}')
@@ -0,0 +1,198 @@
+# Benchmark suite for the simulator and fetchers
+# - Times calculate_playoff_odds on synthetic leagues across league sizes,
+#   remaining weeks and simulation counts
+# - Times fetch_csv, fetch_espn and fetch_sleeper_playoff_odds_data against
+#   the recorded fixtures in benchmarks/fixtures, served locally
+# - Reports p50/p99 latency, simulations/sec and peak traced memory, and
+#   writes everything as JSON so runs can be compared between commits
+#   (see benchmarks/compare.py)
+#
+# Usage: python -m benchmarks.run [--quick] [--output results.json]
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+
+import Fetchers.espn_fetch as espn_fetch
+import Fetchers.sleeper_fetch as sleeper_fetch
+import espn_api.requests.espn_requests as espn_requests
+from Fetchers.csv_fetch import fetch_csv
+from Simulators.exact_sim import EXACT_MAX_OUTCOMES, count_outcomes, use_exact
+from Simulators.monte_carlo import build_sim_inputs
+from benchmarks.fixtures import FIXTURE_LEAGUE_ID, FixtureServer
+from benchmarks.synthetic import synthetic_league
+from playoff_pred import calculate_playoff_odds
+
+LEAGUE_SIZES = (8, 10, 12, 14, 20, 32)
+REMAINING_WEEKS = (1, 2, 3, 4, 5, 6, 7, 8)
+SIMULATION_COUNTS = (1000, 10000, 50000)
+REPEATS = 5
+
+QUICK_LEAGUE_SIZES = (8, 12, 32)
+QUICK_REMAINING_WEEKS = (1, 4, 8)
+QUICK_SIMULATION_COUNTS = (1000, 10000)
+QUICK_REPEATS = 3
+
+SEED = 2024
+
+
+def summarize(samples):
+    """
+    Latency percentiles (seconds) over repeated timings.
+    """
+    samples = np.asarray(samples)
+    return {
+        'p50': float(np.percentile(samples, 50)),
+        'p99': float(np.percentile(samples, 99)),
+        'mean': float(samples.mean()),
+        'min': float(samples.min()),
+        'repeats': len(samples),
+    }
+
+
+def time_call(call, repeats):
+    """
+    Time call() `repeats` times after one untimed warm-up run.
+
+    Returns:
+    - latency summary
+    - peak memory traced during one extra run, in bytes (tracing slows the
+      call down, so it is measured separately from the timings)
+    """
+    call()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return summarize(samples), peak
+
+
+def quiet(call):
+    # The fetchers print as they go; keep that off the benchmark output
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return call()
+    return run
+
+
+def benchmark_simulator(league_sizes, remaining_weeks, simulation_counts, repeats, exact_threshold):
+    results = []
+    for num_teams in league_sizes:
+        for weeks in remaining_weeks:
+            league = synthetic_league(num_teams, weeks, seed=SEED)
+            inputs = build_sim_inputs(league)
+            for num_simulations in simulation_counts:
+                exact = use_exact(inputs, num_simulations, exact_threshold)
+                latency, peak = time_call(quiet(lambda: calculate_playoff_odds(
+                    league,
+                    num_simulations=num_simulations,
+                    seed=SEED,
+                    exact_threshold=exact_threshold)), repeats)
+                results.append({
+                    'name': f'simulate/{num_teams}teams/{weeks}weeks/{num_simulations}sims',
+                    'teams': num_teams,
+                    'remaining_weeks': weeks,
+                    'simulations': num_simulations,
+                    'method': 'exact' if exact else 'simulation',
+                    'latency': latency,
+                    'simulations_per_sec': None if exact else num_simulations / latency['p50'],
+                    'peak_memory_bytes': peak,
+                })
+                rate = f"{num_simulations / latency['p50']:>12,.0f} sims/s" if not exact else ''
+                print(f"{results[-1]['name']:<40} {results[-1]['method']:<10} "
+                      f"p50 {latency['p50'] * 1000:9.2f}ms  p99 {latency['p99'] * 1000:9.2f}ms  "
+                      f"{rate:>19}  {peak / 2 ** 20:8.2f}MiB")
+    return results
+
+
+def benchmark_fetchers(repeats, latency):
+    results = []
+    with FixtureServer(latency=latency) as server:
+        sleeper_fetch.SLEEPER_API_URL = server.url('sleeper')
+        espn_requests.FANTASY_BASE_ENDPOINT = server.url('espn') + '/apis/v3/games/'
+        fetchers = {
+            'fetch_csv': fetch_csv,
+            'fetch_espn': lambda: espn_fetch.fetch_espn(FIXTURE_LEAGUE_ID),
+            'fetch_sleeper_playoff_odds_data': lambda: sleeper_fetch.fetch_sleeper_playoff_odds_data(FIXTURE_LEAGUE_ID),
+        }
+        for name, fetch in fetchers.items():
+            if quiet(fetch)() is None:
+                raise RuntimeError(f'{name} failed against the recorded fixtures')
+            summary, peak = time_call(quiet(fetch), repeats)
+            results.append({
+                'name': f'fetch/{name}',
+                'latency': summary,
+                'peak_memory_bytes': peak,
+            })
+            print(f"{results[-1]['name']:<40} {'':<10} "
+                  f"p50 {summary['p50'] * 1000:9.2f}ms  p99 {summary['p99'] * 1000:9.2f}ms  "
+                  f"{'':>19}  {peak / 2 ** 20:8.2f}MiB")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the simulator and fetchers.')
+    parser.add_argument('--quick', action='store_true', help='smaller grid for a fast check')
+    parser.add_argument('--repeats', type=int, help='timed runs per case')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated network latency per fixture request, in ms (default 0)')
+    parser.add_argument('--exact-threshold', type=int, default=EXACT_MAX_OUTCOMES,
+                        help='passed to calculate_playoff_odds; 0 forces Monte Carlo everywhere')
+    parser.add_argument('--output', default='benchmark_results.json', help='where to write the JSON results')
+    args = parser.parse_args()
+
+    if args.quick:
+        league_sizes, remaining_weeks, simulation_counts = QUICK_LEAGUE_SIZES, QUICK_REMAINING_WEEKS, QUICK_SIMULATION_COUNTS
+        repeats = args.repeats or QUICK_REPEATS
+    else:
+        league_sizes, remaining_weeks, simulation_counts = LEAGUE_SIZES, REMAINING_WEEKS, SIMULATION_COUNTS
+        repeats = args.repeats or REPEATS
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeats': repeats,
+            'fetch_latency_ms': args.latency,
+            'exact_threshold': args.exact_threshold,
+        },
+        'simulator': benchmark_simulator(league_sizes, remaining_weeks, simulation_counts,
+                                         repeats, args.exact_threshold),
+        'fetchers': benchmark_fetchers(repeats, args.latency / 1000.0),
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\nWrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
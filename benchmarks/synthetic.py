@@ -0,0 +1,83 @@
+# Synthetic leagues for benchmarking
+# - Even-sized leagues on a round-robin schedule (circle method), so every
+#   team plays once a week
+# - Seeded, so every run benchmarks exactly the same standings and schedule
+
+import random
+
+from league import League
+
+REGULAR_SEASON_WEEKS = 14
+LEAGUE_AVERAGE_PPG = 110.0
+TEAM_SPREAD = 10.0   # std dev of team strength (average points per game)
+WEEKLY_SPREAD = 25.0  # std dev of a team's score around its average
+
+
+def round_robin_week(teams, week):
+    """
+    (home, away) pairs for one week of a round-robin schedule.
+
+    The first team stays put while the others rotate one seat per week;
+    seat i plays seat n-1-i.
+    """
+    rotation = len(teams) - 1
+    shift = week % rotation
+    seats = [teams[0]] + teams[1:][shift:] + teams[1:][:shift]
+    half = len(teams) // 2
+    return [(seats[i], seats[-1 - i]) if week % 2 else (seats[-1 - i], seats[i]) for i in range(half)]
+
+
+def synthetic_season(num_teams, remaining_weeks, seed=0):
+    """
+    Generate a regular season with all but the last `remaining_weeks` weeks played.
+    
+    Returns:
+    - teams: list of team names
+    - weeks: list of every regular-season week's (home, away) pairs
+    - scores: list of every played week's (home_points, away_points) pairs
+    """
+    if num_teams % 2:
+        raise ValueError('Synthetic leagues need an even number of teams')
+    if not 0 < remaining_weeks < REGULAR_SEASON_WEEKS:
+        raise ValueError(f'Remaining weeks must be between 1 and {REGULAR_SEASON_WEEKS - 1}')
+    
+    rng = random.Random(seed)
+    teams = [f'Team{i + 1:02d}' for i in range(num_teams)]
+    strength = {team: rng.gauss(LEAGUE_AVERAGE_PPG, TEAM_SPREAD) for team in teams}
+    weeks = [round_robin_week(teams, week) for week in range(REGULAR_SEASON_WEEKS)]
+    
+    scores = []
+    for week in weeks[:REGULAR_SEASON_WEEKS - remaining_weeks]:
+        scores.append([(round(max(0.0, rng.gauss(strength[home], WEEKLY_SPREAD)), 2),
+                        round(max(0.0, rng.gauss(strength[away], WEEKLY_SPREAD)), 2))
+                       for home, away in week])
+    return teams, weeks, scores
+
+
+def standings(teams, weeks, scores):
+    """
+    Build current_wins ({team: (wins, losses, ties, points_for)}) from played weeks.
+    """
+    records = {team: [0, 0, 0, 0.0] for team in teams}
+    for week, week_scores in zip(weeks, scores):
+        for (home, away), (home_points, away_points) in zip(week, week_scores):
+            records[home][3] += home_points
+            records[away][3] += away_points
+            if home_points == away_points:
+                records[home][2] += 1
+                records[away][2] += 1
+            else:
+                winner, loser = (home, away) if home_points > away_points else (away, home)
+                records[winner][0] += 1
+                records[loser][1] += 1
+    return {team: (wins, losses, ties, round(points, 2)) for team, (wins, losses, ties, points) in records.items()}
+
+
+def synthetic_league(num_teams, remaining_weeks, seed=0):
+    """
+    A synthetic League, as a fetcher would return it.
+    """
+    teams, weeks, scores = synthetic_season(num_teams, remaining_weeks, seed)
+    current_wins = standings(teams, weeks, scores)
+    remaining_schedule = [game for week in weeks[len(scores):] for game in week]
+    return League.from_records(current_wins, remaining_schedule, teams)
@@ -0,0 +1,185 @@
+# In-process caches shared by the fetch and simulation layers
+# - TTLCache: LRU eviction, time-to-live and stale-while-revalidate refresh
+# - SQLiteStore: optional on-disk backend so entries survive restarts and can
+#   be shared by every worker process on a host
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class SQLiteFile:
+    """
+    A SQLite file, created along with its directory if missing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _connect(self):
+        # A short-lived connection per call keeps the store safe to use from any thread
+        return sqlite3.connect(self.path, timeout=5)
+
+
+class SQLiteStore(SQLiteFile):
+    """
+    Key/value table in a SQLite file. Keys are tuples; values must be
+    JSON-serializable once passed through `encode`, and come back through `decode`.
+    With `max_rows` set, every write drops the oldest rows beyond that many.
+    """
+
+    def __init__(self, path, table='cache', encode=None, decode=None, max_rows=None):
+        super().__init__(path)
+        self.table = table
+        self.max_rows = max_rows
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda value: value)
+        with self._connect() as conn:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {table} '
+                         '(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_stored_at ON {table} (stored_at)')
+
+    def get(self, key):
+        """
+        Return (value, stored_at), or None if the key isn't stored.
+        """
+        with self._connect() as conn:
+            row = conn.execute(f'SELECT value, stored_at FROM {self.table} WHERE key = ?',
+                               (json.dumps(key),)).fetchone()
+        if row is None:
+            return None
+        return self.decode(json.loads(row[0])), row[1]
+
+    def set(self, key, value, stored_at):
+        with self._connect() as conn:
+            conn.execute(f'INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)',
+                         (json.dumps(key), json.dumps(self.encode(value)), stored_at))
+            if self.max_rows is not None:
+                conn.execute(f'DELETE FROM {self.table} WHERE key IN '
+                             f'(SELECT key FROM {self.table} ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                             (self.max_rows,))
+
+    def prune(self, older_than):
+        with self._connect() as conn:
+            conn.execute(f'DELETE FROM {self.table} WHERE stored_at < ?', (older_than,))
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries go stale after `ttl` seconds.
+
+    Stale entries are still served for another `stale_ttl` seconds while a
+    background thread reloads them (stale-while-revalidate). Set ttl to None
+    for entries that never expire.
+    """
+
+    def __init__(self, max_entries=256, ttl=300, stale_ttl=3600, store=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.store = store
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.store is not None:
+            entry = self.store.get(key)
+            if entry is not None:
+                self._remember(key, *entry)
+        return entry
+
+    def _remember(self, key, value, stored_at):
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """
+        Return the cached value if it is fresh, otherwise None.
+        """
+        entry = self._lookup(key)
+        if entry is None or (self.ttl is not None and time.time() - entry[1] >= self.ttl):
+            return None
+        return entry[0]
+
+    def set(self, key, value):
+        stored_at = time.time()
+        self._remember(key, value, stored_at)
+        if self.store is not None:
+            self.store.set(key, value, stored_at)
+            if self.ttl is not None:
+                self.store.prune(stored_at - self.ttl - self.stale_ttl)
+
+    def get_or_load(self, key, loader):
+        """
+        Return (value, status), calling loader() on a miss.
+
+        status is 'hit', 'stale' (served while a background reload runs) or
+        'miss'. A loader result of None is returned but never cached.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if self.ttl is None or age < self.ttl:
+                self._count('hits')
+                return value, 'hit'
+            if age < self.ttl + self.stale_ttl:
+                self._count('stale_hits')
+                self._refresh_in_background(key, loader)
+                return value, 'stale'
+
+        self._count('misses')
+        value = loader()
+        if value is not None:
+            self.set(key, value)
+        return value, 'miss'
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = loader()
+                if value is not None:
+                    self.set(key, value)
+            except Exception as e:
+                print(f"Error refreshing cache entry {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def stats(self):
+        requests = self.hits + self.stale_hits + self.misses
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.stale_hits) / requests if requests else 0.0,
+            'size': len(self._entries),
+        }
@@ -0,0 +1,154 @@
+# Background simulation jobs
+# - A bounded pool of worker threads runs simulations outside the request
+# - Clients poll a job for its status, progress and the odds so far
+# - Identical requests still queued or running share one job, which only
+#   stops once every client that asked for it has cancelled
+# - Configured from the environment:
+#   JOB_WORKERS (default 2), JOB_QUEUE_SIZE (default 32), JOB_RETENTION (seconds, default 600)
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'  # queued, running, done, failed or cancelled
+        self.progress = 0.0
+        self.result = None  # partial odds while running, final odds when done
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.subscribers = 1  # clients that asked for this job and haven't cancelled
+
+    def report(self, simulations_done, num_simulations, odds):
+        """
+        Progress callback for calculate_playoff_odds; also where cancellation lands.
+        """
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+        playoff_odds, bye_odds, average_finishes = odds
+        self.progress = simulations_done / num_simulations
+        self.result = {
+            'playoff_odds': playoff_odds,
+            'bye_odds': bye_odds,
+            'average_finishes': average_finishes,
+        }
+
+    def finish(self, status, result=None, error=None):
+        self.status = status
+        if result is not None:
+            self.result = result
+        self.error = error
+        if status == 'done':
+            self.progress = 1.0
+        self.finished_at = time.time()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class JobManager:
+    def __init__(self, max_workers=2, max_queued=32, retention=600):
+        self.max_queued = max_queued
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='simulation-job')
+        self._jobs = {}
+        self._active = {}  # dedup key -> job still queued or running
+        self._lock = threading.Lock()
+
+    def submit(self, key, run):
+        """
+        Queue run(job) unless an identical job (same key) is already queued or running.
+
+        run should return the job's final result and pass job.report as its
+        progress callback.
+
+        Returns:
+        - the job, and whether it was newly created
+        """
+        with self._lock:
+            self._purge_finished()
+            job = self._active.get(key)
+            # A job every client has cancelled may still be winding down
+            if job is not None and not job.cancel_event.is_set():
+                job.subscribers += 1
+                return job, False
+            if len(self._active) >= self.max_queued:
+                raise JobQueueFull()
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            job.future = self._executor.submit(self._run, job, run)
+            return job, True
+
+    def _run(self, job, run):
+        try:
+            if job.cancel_event.is_set():
+                raise JobCancelled()
+            job.status = 'running'
+            job.finish('done', result=run(job))
+        except JobCancelled:
+            job.finish('cancelled')
+        except Exception as e:
+            job.finish('failed', error=str(e))
+        finally:
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Withdraw one client from a queued or running job.
+
+        The job keeps running for the clients still sharing it, and is only
+        cancelled when the last of them withdraws.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in ('queued', 'running'):
+                return job
+            job.subscribers -= 1
+            if job.subscribers > 0:
+                return job
+            job.cancel_event.set()
+            if job.future.cancel():
+                job.finish('cancelled')
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+            return job
+
+    def _purge_finished(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager(max_workers=int(os.environ.get('JOB_WORKERS', 2)),
+                         max_queued=int(os.environ.get('JOB_QUEUE_SIZE', 32)),
+                         retention=float(os.environ.get('JOB_RETENTION', 600)))
@@ -0,0 +1,128 @@
+# Array-backed league description shared by the fetchers and simulators
+# - Team names are interned to integer indices once, when the league is
+#   built; everything downstream works on indices and contiguous arrays
+# - Records and points are numpy arrays, the remaining schedule a
+#   (games x 2) array of (home, away) team indices
+# - Pickles as a handful of arrays, so it's cheap to send to worker
+#   processes, and round-trips through JSON with to_dict/from_dict for the caches
+
+from collections import namedtuple
+
+import numpy as np
+
+# What a season-aware fetcher reports about a league
+SeasonState = namedtuple('SeasonState', [
+    'current_wins',   # {team: (wins, losses, ties, points_for)}
+    'teams',
+    'playoff_teams',
+    'bye_teams',
+    'week',           # first regular-season week not yet played
+    'last_week',      # final regular-season week
+    'matchups',       # {week: [(home, away), ...]} for the weeks that were fetched
+])
+
+class League:
+    """
+    A league's standings, remaining schedule and playoff format.
+
+    Index i of every array is team teams[i].
+    """
+
+    def __init__(self, teams, wins, losses, ties, points, schedule, playoff_teams=6, bye_teams=2):
+        self.teams = list(teams)
+        self.wins = np.asarray(wins, dtype=np.int64)
+        self.losses = np.asarray(losses, dtype=np.int64)
+        self.ties = np.asarray(ties, dtype=np.int64)
+        self.points = np.asarray(points, dtype=np.float64)
+        self.schedule = np.asarray(schedule, dtype=np.intp).reshape(-1, 2)
+        self.playoff_teams = playoff_teams
+        self.bye_teams = bye_teams
+
+    @classmethod
+    def from_records(cls, current_wins, remaining_schedule, teams, playoff_teams=6, bye_teams=2):
+        """
+        Build a league from name-keyed records, the way the APIs describe it.
+
+        Parameters:
+        - current_wins: dict of team name to (wins, losses, ties, points_for);
+          missing (None) values count as 0
+        - remaining_schedule: list of (home, away) team name pairs
+        - teams: team names, in the order to index them
+
+        Raises ValueError if the schedule names a team that isn't in `teams`.
+        """
+        index = {team: i for i, team in enumerate(teams)}
+        records = np.array([[value or 0 for value in current_wins[team]] for team in teams],
+                           dtype=np.float64).reshape(-1, 4)
+        try:
+            schedule = [(index[home], index[away]) for home, away in remaining_schedule]
+        except KeyError as e:
+            raise ValueError(f"Schedule names unknown team {e}") from None
+        return cls(teams, records[:, 0], records[:, 1], records[:, 2], records[:, 3],
+                   schedule, playoff_teams, bye_teams)
+
+    @classmethod
+    def from_season(cls, season, matchups):
+        """
+        Build a league from a SeasonState and the matchups of every week from
+        season.week through season.last_week.
+        """
+        remaining_schedule = [game for week in range(season.week, season.last_week + 1)
+                              for game in matchups[week]]
+        return cls.from_records(season.current_wins, remaining_schedule, season.teams,
+                                season.playoff_teams, season.bye_teams)
+
+    @property
+    def num_teams(self):
+        return len(self.teams)
+
+    @property
+    def home(self):
+        return self.schedule[:, 0]
+
+    @property
+    def away(self):
+        return self.schedule[:, 1]
+
+    @property
+    def games_played(self):
+        return self.wins + self.losses + self.ties
+
+    @property
+    def avg_ppg(self):
+        games_played = self.games_played
+        if np.any(games_played == 0):
+            raise ValueError("Every team needs at least one game played to estimate its scoring")
+        return self.points / games_played
+
+    def current_wins(self):
+        """
+        Name-keyed {team: (wins, losses, ties, points_for)} view of the standings.
+        """
+        return {team: (int(self.wins[i]), int(self.losses[i]), int(self.ties[i]), float(self.points[i]))
+                for i, team in enumerate(self.teams)}
+
+    def remaining_schedule(self):
+        """
+        Remaining games as (home, away) team name pairs.
+        """
+        return [(self.teams[home], self.teams[away]) for home, away in self.schedule.tolist()]
+
+    def to_dict(self):
+        return {
+            'teams': self.teams,
+            'wins': self.wins.tolist(),
+            'losses': self.losses.tolist(),
+            'ties': self.ties.tolist(),
+            'points': self.points.tolist(),
+            'schedule': self.schedule.tolist(),
+            'playoff_teams': self.playoff_teams,
+            'bye_teams': self.bye_teams,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        return f"League({self.num_teams} teams, {len(self.schedule)} games left)"
@@ -0,0 +1,139 @@
+# Lightweight metrics for the hot paths
+# - span(name, **labels): times a block into the span_seconds histogram,
+#   labelled by span name and any extra labels (e.g. source)
+# - Counters, gauges and histograms, rendered in the Prometheus text format
+#   for the /metrics endpoint
+# - Metrics live in the process that records them: spans inside simulation
+#   worker processes (workers > 1) aren't collected, only the run around them
+# - METRICS_ENABLED=0 turns recording off; span() then hands back one shared
+#   no-op context manager and every other call returns straight away
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+PREFIX = 'playoff_odds_'
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'span_seconds': 'Time spent in each instrumented phase',
+    'cache_requests_total': 'Cache lookups by cache and outcome',
+    'fetch_failures_total': 'League fetches that failed, by source',
+    'requests_total': 'API requests by endpoint and source',
+    'batch_errors_total': 'Leagues in a batch that failed, by source',
+    'simulations_total': 'Simulated seasons',
+    'simulations_per_second': 'Throughput of the most recent simulation run',
+}
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_gauges = {}      # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [per-bucket counts (last is +Inf), sum, count]
+
+NO_SPAN = nullcontext()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def increment(name, amount=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def set_gauge(name, value, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+
+def observe(name, value, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    bucket = bisect_left(BUCKETS, value)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0, 0]
+        histogram[0][bucket] += 1
+        histogram[1] += value
+        histogram[2] += 1
+
+
+class Span:
+    __slots__ = ('labels', 'start')
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe('span_seconds', time.perf_counter() - self.start, **self.labels)
+
+
+def span(name, **labels):
+    """
+    Context manager timing its block into span_seconds{span=name, ...labels}.
+    """
+    if not ENABLED:
+        return NO_SPAN
+    return Span(dict(labels, span=name))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def render():
+    """
+    Every metric recorded so far, in the Prometheus text exposition format.
+    """
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {key: (list(counts), total, count) for key, (counts, total, count) in _histograms.items()}
+
+    families = {}
+    for kind, values in (('counter', counters), ('gauge', gauges), ('histogram', histograms)):
+        for (name, labels), value in values.items():
+            families.setdefault((name, kind), []).append((labels, value))
+
+    lines = []
+    for (name, kind), series in sorted(families.items()):
+        full_name = PREFIX + name
+        if name in HELP:
+            lines.append(f'# HELP {full_name} {HELP[name]}')
+        lines.append(f'# TYPE {full_name} {kind}')
+        for labels, value in sorted(series):
+            if kind != 'histogram':
+                lines.append(f'{full_name}{_format_labels(labels)} {value}')
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{full_name}_bucket{_format_labels(labels + (("le", bound),))} {cumulative}')
+            lines.append(f'{full_name}_sum{_format_labels(labels)} {total}')
+            lines.append(f'{full_name}_count{_format_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
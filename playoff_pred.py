@@ -1,17 +1,456 @@
 # Monte Carlo simulator for fantasy playoffs
-# - Edit teams, current_wins, schedule (list of remaining matches as pairs)
+# - Takes a League (league.py): standings, remaining schedule and playoff format
 # - Assumes remaining games are 50/50; ties not modeled (but could be added)
 # - Tiebreakers: coin flip among tied teams for playoff/bye placement
 
+import math
 import random
+import time
 from collections import defaultdict
 
+import metrics
+
+from Fetchers.csv_fetch import fetch_csv
+from Simulators.adaptive_sim import run_simulations_adaptive
+from Simulators.analytic_sim import analytic_odds
+from Simulators.batch_sim import run_packed
+from Simulators.clinch import clinch_status
+from Simulators.leverage import combine_chunks, conditional_odds, consistent_rows, outcome_counts, run_outcome_chunk, sample_cache
+from Simulators.exact_sim import EXACT_MAX_OUTCOMES, enumerate_outcomes, use_exact
+from Simulators.monte_carlo import BATCH_SIZE, accumulate_counts, build_sim_inputs, chunk_plan, iter_chunks
+from Simulators.parallel_sim import iter_chunks_parallel, map_ordered
+from Simulators.result_cache import league_fingerprint
+from Simulators.sample_store import chunk_starts, iter_chunks_stored, sample_key, storable, stored_scores
+from Simulators.sweep import exact_finishes, run_sweep_chunk, surface_from_histograms, validate_grid
+
 
 #TODO: Update to caluculate ties as well
-def calculate_playoff_odds(schedule, teams, current_wins, num_simulations=50000, std_dev=0.50, playoff_teams=6, bye_teams=2):
+def calculate_playoff_odds(league, num_simulations=50000, std_dev=0.50, seed=None, workers=1, exact_threshold=EXACT_MAX_OUTCOMES, progress=None):
     """
     Calculate the probability of each team making the playoffs.
     
+    Parameters:
+    - league: League with the standings, remaining schedule and playoff format
+    - num_simulations: number of Monte Carlo simulations to run (default 50000)
+    - std_dev: standard deviation factor for points fluctuation (default 0.50)
+    - seed: optional seed for reproducible results
+    - workers: number of processes to shard the simulations across (default 1).
+      A seeded run gives the same odds for any number of workers.
+    - exact_threshold: when the remaining games have at most this many win/loss
+      combinations, enumerate them all instead of simulating (0 disables).
+      The points tiebreak is then sampled over about num_simulations rows, so
+      small runs of leagues with many outcomes are still simulated (see
+      Simulators/exact_sim.py use_exact)
+    - progress: optional callback, called as progress(simulations_done,
+      num_simulations, (playoff_odds, bye_odds, average_finishes)) with the odds
+      so far after every batch. An exception raised by it aborts the run.
+    
+    Returns:
+    - playoff_odds: dict with team names as keys and playoff probability as values
+    - bye_odds: dict with team names as keys and bye (top 2 seed) probability as values
+    - average_finishes: dict with team names as keys and average finishing position as values
+    The top league.playoff_teams teams make the playoffs, ranked by:
+    1. Most wins
+    2. Highest points scored (tiebreaker)
+    
+    The top league.bye_teams teams receive byes.
+    
+    IMPORTANT: Points fluctuate randomly in remaining games with variance.
+    Each team scores around its own average, with a spread of std_dev times
+    the league average. Simulations run in vectorized batches
+    (see Simulators/monte_carlo.py). Teams the clinch pre-pass has already
+    placed (see Simulators/clinch.py) are not re-ranked, so their odds come
+    out as exactly 0 or 1.
+    """
+    snapshots = iter_playoff_odds(league, num_simulations, std_dev, seed, workers, exact_threshold)
+    try:
+        for simulations, odds in snapshots:
+            if progress is not None:
+                progress(simulations, num_simulations, odds)
+    finally:
+        snapshots.close()
+    return odds
+
+
+def iter_playoff_odds(league, num_simulations=50000, std_dev=0.50, seed=None, workers=1, exact_threshold=EXACT_MAX_OUTCOMES, snapshot_every=BATCH_SIZE):
+    """
+    Generator version of calculate_playoff_odds that yields the odds as they converge.
+    
+    Parameters:
+    - snapshot_every: simulations between snapshots (default BATCH_SIZE). Each
+      snapshot is one independently seeded chunk, so a seeded run only
+      reproduces calculate_playoff_odds when this is left at the default.
+    - everything else: as in calculate_playoff_odds
+    
+    Yields:
+    - simulations_done, (playoff_odds, bye_odds, average_finishes) over every
+      simulation so far. The last snapshot is the final result. Exact results
+      come as a single snapshot.
+    
+    Closing the generator early (e.g. when a streaming client disconnects)
+    stops the simulation and cancels any chunks still queued on workers.
+    """
+    teams, playoff_teams, bye_teams = league.teams, league.playoff_teams, league.bye_teams
+    with metrics.span('setup'):
+        inputs = build_sim_inputs(league, std_dev)
+        exact = use_exact(inputs, num_simulations, exact_threshold)
+    if exact:
+        with metrics.span('exact'):
+            odds = odds_from_probabilities(teams, *enumerate_outcomes(inputs, playoff_teams, bye_teams, seed,
+                                                                      num_simulations))
+        yield num_simulations, odds
+        return
+    
+    with metrics.span('setup'):
+        plan = chunk_plan(num_simulations, seed, snapshot_every)
+    if storable(inputs):
+        key = sample_key(league, std_dev, num_simulations, seed, snapshot_every)
+        chunks = iter_chunks_stored(key, inputs, plan, playoff_teams, bye_teams, workers)
+    elif workers > 1:
+        chunks = iter_chunks_parallel(inputs, plan, playoff_teams, bye_teams, workers)
+    else:
+        chunks = iter_chunks(inputs, plan, playoff_teams, bye_teams)
+    start = time.perf_counter()
+    simulations = 0
+    try:
+        for simulations, playoff_count, bye_count, finish_sum in accumulate_counts(plan, chunks, len(teams)):
+            with metrics.span('aggregate'):
+                odds = odds_from_counts(teams, playoff_count, bye_count, finish_sum, simulations)
+            yield simulations, odds
+    finally:
+        chunks.close()
+        # Time spent by the consumer between snapshots is included, so this
+        # is the rate a caller actually saw
+        elapsed = time.perf_counter() - start
+        metrics.increment('simulations_total', simulations)
+        if simulations and elapsed > 0:
+            metrics.set_gauge('simulations_per_second', simulations / elapsed, workers=workers)
+
+
+def calculate_playoff_odds_adaptive(league, target_ci=0.005, max_simulations=100000, std_dev=0.50, seed=None, workers=1, confidence=0.95, exact_threshold=EXACT_MAX_OUTCOMES, progress=None):
+    """
+    Calculate playoff odds, simulating only until they are precise enough.
+    
+    Parameters:
+    - target_ci: stop once every team's playoff odds have a confidence interval
+      no wider than +/- target_ci (default 0.005, i.e. +/-0.5%)
+    - max_simulations: upper bound on simulations if the target is never reached
+    - confidence: confidence level of the interval (default 0.95)
+    - progress: optional callback, called as progress(simulations_done,
+      max_simulations, (playoff_odds, bye_odds, average_finishes)) after every
+      chunk. An exception raised by it aborts the run.
+    - league, std_dev, seed, workers, exact_threshold: as in calculate_playoff_odds
+    
+    Returns:
+    - playoff_odds, bye_odds, average_finishes: as in calculate_playoff_odds
+    - precision: dict with the method used ('simulation' or 'exact'), the number
+      of simulations run, the confidence level, the largest half-width reached
+      and each team's playoff CI half-width (all zero for exact results)
+    """
+    teams, playoff_teams, bye_teams = league.teams, league.playoff_teams, league.bye_teams
+    inputs = build_sim_inputs(league, std_dev)
+    if use_exact(inputs, max_simulations, exact_threshold):
+        playoff_odds, bye_odds, average_finishes = odds_from_probabilities(
+            teams, *enumerate_outcomes(inputs, playoff_teams, bye_teams, seed, max_simulations))
+        if progress is not None:
+            progress(max_simulations, max_simulations, (playoff_odds, bye_odds, average_finishes))
+        precision = {
+            'method': 'exact',
+            'simulations': 0,
+            'confidence': confidence,
+            'max_ci': 0.0,
+            'playoff_ci': {team: 0.0 for team in teams},
+        }
+        return playoff_odds, bye_odds, average_finishes, precision
+    
+    def chunk_progress(simulations, playoff_count, bye_count, finish_sum):
+        # A run that reaches its target early jumps straight to done
+        progress(simulations, max_simulations, odds_from_counts(teams, playoff_count, bye_count, finish_sum, simulations))
+
+    playoff_count, bye_count, finish_sum, simulations, half_widths = run_simulations_adaptive(
+        inputs, target_ci, max_simulations, playoff_teams, bye_teams, seed, workers, confidence,
+        chunk_progress if progress is not None else None)
+    
+    playoff_odds, bye_odds, average_finishes = odds_from_counts(teams, playoff_count, bye_count, finish_sum, simulations)
+    precision = {
+        'method': 'simulation',
+        'simulations': simulations,
+        'confidence': confidence,
+        'max_ci': float(half_widths.max()),
+        'playoff_ci': {team: float(half_widths[i]) for i, team in enumerate(teams)},
+    }
+    return playoff_odds, bye_odds, average_finishes, precision
+
+
+def calculate_playoff_odds_analytic(league, std_dev=0.50):
+    """
+    Approximate playoff odds in closed form, without simulating.
+    
+    Meant for interactive previews: it takes a few milliseconds, and its
+    playoff and bye odds are within ANALYTIC_ERROR_BOUND of
+    calculate_playoff_odds (see Simulators/analytic_sim.py for the model and
+    how the bound was measured).
+    
+    Parameters:
+    - league, std_dev: as in calculate_playoff_odds
+    
+    Returns:
+    - playoff_odds, bye_odds, average_finishes: as from calculate_playoff_odds
+    """
+    with metrics.span('setup'):
+        inputs = build_sim_inputs(league, std_dev)
+    with metrics.span('analytic'):
+        return odds_from_probabilities(league.teams, *analytic_odds(inputs, league.playoff_teams, league.bye_teams))
+
+
+def calculate_playoff_odds_sweep(league, std_devs, playoff_teams=None, bye_teams=None, num_simulations=50000, seed=None, workers=1, exact_threshold=EXACT_MAX_OUTCOMES):
+    """
+    Calculate playoff odds over a grid of std_dev and playoff settings in one run.
+    
+    Every grid point shares the same random draws (common random numbers), so
+    differences between points come from the parameters, not sampling noise.
+    The season is simulated once and ranked once per std_dev; playoff and bye
+    cutoffs cost nothing extra. Each grid point gives the same odds as
+    calculate_playoff_odds with those settings and seed.
+    
+    Parameters:
+    - league: League to simulate
+    - std_devs: list of std_dev values (see calculate_playoff_odds)
+    - playoff_teams, bye_teams: lists of cutoffs (default: the league's own)
+    - num_simulations, seed, workers, exact_threshold: as in calculate_playoff_odds
+    
+    Returns:
+    - playoff_odds: dict with team names as keys and [std_dev][playoff_teams] grids of probabilities as values
+    - bye_odds: dict with team names as keys and [std_dev][bye_teams] grids of probabilities as values
+    - average_finishes: dict with team names as keys and per-std_dev average finishing positions as values
+    """
+    playoff_teams = [league.playoff_teams] if playoff_teams is None else list(playoff_teams)
+    bye_teams = [league.bye_teams] if bye_teams is None else list(bye_teams)
+    validate_grid(league.num_teams, std_devs, playoff_teams, bye_teams)
+    
+    with metrics.span('setup'):
+        # The clinch blocks and contested games don't depend on std_dev
+        inputs = build_sim_inputs(league)
+        exact = use_exact(inputs, num_simulations, exact_threshold)
+    
+    if exact:
+        with metrics.span('exact'):
+            finishes = exact_finishes(inputs, std_devs, seed, num_simulations)
+            playoff_prob, bye_prob, average_finish = surface_from_histograms(finishes, playoff_teams, bye_teams)
+    else:
+        plan = chunk_plan(num_simulations, seed)
+        calls = ((inputs, size, seed_seq, list(std_devs)) for size, seed_seq in plan)
+        finish_counts = sum(map_ordered(run_sweep_chunk, calls, min(workers, len(plan))))
+        metrics.increment('simulations_total', num_simulations)
+        with metrics.span('aggregate'):
+            # Cutoffs are read off the counts first, so each grid point divides
+            # the same integers calculate_playoff_odds would
+            playoff_prob, bye_prob, average_finish = (
+                total / num_simulations for total in surface_from_histograms(finish_counts, playoff_teams, bye_teams))
+    
+    teams = league.teams
+    playoff_odds = {team: playoff_prob[:, i].tolist() for i, team in enumerate(teams)}
+    bye_odds = {team: bye_prob[:, i].tolist() for i, team in enumerate(teams)}
+    average_finishes = {team: average_finish[:, i].tolist() for i, team in enumerate(teams)}
+    return playoff_odds, bye_odds, average_finishes
+
+
+def calculate_leverage(league, num_simulations=50000, std_dev=0.50, seed=None, workers=1, pinned=None):
+    """
+    How much each remaining game matters: every team's playoff odds if either side wins it.
+    
+    One set of simulations is run per league and settings and kept in
+    memory; every conditional odds figure is read from those same seasons,
+    and pinning results only filters them, so what-if queries never simulate
+    again.
+    
+    Parameters:
+    - league, num_simulations, std_dev, seed, workers: as in calculate_playoff_odds
+    - pinned: dict of game index (into the remaining schedule) to True when
+      the home team wins or False when the away team does
+    
+    Returns:
+    - dict with the number of simulations matching the pins, overall
+      playoff_odds and bye_odds given the pins, and per game its home and
+      away team, home_win_prob and each team's playoff odds if the home or
+      away team wins (None if that never happened in the matching seasons)
+    
+    Raises ValueError if a pinned game doesn't exist or no simulated season
+    matches the pins.
+    """
+    key = league_fingerprint(league=league, num_simulations=num_simulations, std_dev=std_dev, seed=seed)
+    samples, status = sample_cache.get_or_load(
+        key, lambda: simulate_outcomes(league, num_simulations, std_dev, seed, workers))
+    metrics.increment('cache_requests_total', cache='leverage', status=status)
+    
+    rows = consistent_rows(samples, pinned or {})
+    simulations = len(rows)
+    if not simulations:
+        raise ValueError("No simulated season matches the pinned results")
+    with metrics.span('aggregate', engine='leverage'):
+        playoff_count, bye_count, home_wins, playoffs_if_home_won = outcome_counts(samples, rows)
+        if_home_won, if_away_won = conditional_odds(playoff_count, home_wins, playoffs_if_home_won, simulations)
+    
+    teams = league.teams
+    def by_team(odds):
+        return {team: None if math.isnan(odds[i]) else float(odds[i]) for i, team in enumerate(teams)}
+    
+    games = [{
+        'game': g,
+        'home': teams[home],
+        'away': teams[away],
+        'home_win_prob': float(home_wins[g] / simulations),
+        'playoff_odds_if_home_wins': by_team(if_home_won[g]),
+        'playoff_odds_if_away_wins': by_team(if_away_won[g]),
+    } for g, (home, away) in enumerate(league.schedule.tolist())]
+    return {
+        'simulations': simulations,
+        'playoff_odds': by_team(playoff_count / simulations),
+        'bye_odds': by_team(bye_count / simulations),
+        'games': games,
+    }
+
+
+def simulate_outcomes(league, num_simulations=50000, std_dev=0.50, seed=None, workers=1):
+    """
+    Simulate a league, keeping every season's game results and playoff and bye teams.
+    
+    Uses the same draws as calculate_playoff_odds for the same seed, read
+    from the sample store when it's enabled.
+    """
+    with metrics.span('setup', engine='leverage'):
+        inputs = build_sim_inputs(league, std_dev)
+        plan = chunk_plan(num_simulations, seed)
+    stored = [None] * len(plan)
+    if storable(inputs):
+        path = stored_scores(sample_key(league, std_dev, num_simulations, seed), inputs, plan)
+        stored = [(path, start) for start in chunk_starts(plan)]
+    calls = ((inputs, size, seed_seq, league.playoff_teams, league.bye_teams, where)
+             for (size, seed_seq), where in zip(plan, stored))
+    samples = combine_chunks(map_ordered(run_outcome_chunk, calls, min(workers, len(plan))),
+                             len(inputs.home), len(inputs.teams))
+    metrics.increment('simulations_total', num_simulations)
+    return samples
+
+
+def calculate_playoff_odds_batch(leagues, workers=1, exact_threshold=EXACT_MAX_OUTCOMES):
+    """
+    Calculate playoff odds for many leagues in one pass.
+    
+    Returns:
+    - list with one (odds, error) pair per league, in order: odds is the
+      (playoff_odds, bye_odds, average_finishes) tuple or None, error is a
+      message or None
+    
+    See iter_playoff_odds_batch for the parameters.
+    """
+    results = [None] * len(leagues)
+    for i, odds, error in iter_playoff_odds_batch(leagues, workers, exact_threshold):
+        results[i] = (odds, error)
+    return results
+
+
+def iter_playoff_odds_batch(leagues, workers=1, exact_threshold=EXACT_MAX_OUTCOMES):
+    """
+    Generator version of calculate_playoff_odds_batch yielding leagues as they finish.
+    
+    Parameters:
+    - leagues: list of dicts of calculate_playoff_odds arguments: league, and
+      optionally num_simulations, std_dev and seed (same defaults)
+    - workers, exact_threshold: as in calculate_playoff_odds
+    
+    Yields:
+    - index into leagues, odds tuple or None, error message or None. Leagues
+      that can be enumerated exactly or fail come first; the rest follow as
+      each pack finishes. A league that fails never stops the others.
+    
+    Leagues with the same team count and simulation count are simulated
+    together (see Simulators/batch_sim.py); a seeded league gets the same
+    odds calculate_playoff_odds would give it.
+    """
+    packs = defaultdict(list)
+    for i, entry in enumerate(leagues):
+        try:
+            league = entry['league']
+            teams, playoff_teams, bye_teams = league.teams, league.playoff_teams, league.bye_teams
+            num_simulations = entry.get('num_simulations', 50000)
+            seed = entry.get('seed')
+            with metrics.span('setup', engine='packed'):
+                inputs = build_sim_inputs(league, entry.get('std_dev', 0.50))
+                exact = use_exact(inputs, num_simulations, exact_threshold)
+            if exact:
+                with metrics.span('exact'):
+                    odds = odds_from_probabilities(teams, *enumerate_outcomes(inputs, playoff_teams, bye_teams, seed,
+                                                                              num_simulations))
+                yield i, odds, None
+                continue
+        except Exception as e:
+            yield i, None, f"Invalid league: {e}"
+            continue
+        packs[num_simulations, len(teams)].append((i, inputs, playoff_teams, bye_teams, seed))
+    
+    for (num_simulations, _), members in packs.items():
+        indices, inputs, playoff_teams, bye_teams, seeds = zip(*members)
+        for row, (playoff_count, bye_count, finish_sum) in run_packed(list(inputs), num_simulations, playoff_teams,
+                                                                      bye_teams, seeds, workers):
+            metrics.increment('simulations_total', num_simulations)
+            yield indices[row], odds_from_counts(inputs[row].teams, playoff_count, bye_count, finish_sum, num_simulations), None
+
+
+def calculate_clinch_status(league):
+    """
+    Report which teams have clinched or been eliminated, without simulating.
+    
+    A team is only reported as clinched or eliminated when no outcome of the
+    remaining schedule could change it (see Simulators/clinch.py).
+    
+    Returns:
+    - dict with team names as keys and dicts of best_finish, worst_finish,
+      clinched_playoffs, eliminated, clinched_bye and eliminated_from_bye as values
+    """
+    inputs = build_sim_inputs(league)
+    return clinch_status(inputs, league.playoff_teams, league.bye_teams)
+
+
+def odds_from_counts(teams, playoff_count, bye_count, finish_sum, num_simulations):
+    """
+    Turn the engine's per-team counters into name-keyed odds dicts.
+    """
+    return odds_from_probabilities(teams,
+                                   playoff_count / num_simulations,
+                                   bye_count / num_simulations,
+                                   finish_sum / num_simulations)
+
+
+def odds_from_probabilities(teams, playoff_prob, bye_prob, average_finish):
+    """
+    Turn per-team probability arrays into name-keyed odds dicts.
+    """
+    playoff_odds = {
+        team: float(playoff_prob[i])
+        for i, team in enumerate(teams)
+    }
+    
+    bye_odds = {
+        team: float(bye_prob[i])
+        for i, team in enumerate(teams)
+    }
+    
+    average_finishes = {
+        team: float(average_finish[i])
+        for i, team in enumerate(teams)
+    }
+    
+    return playoff_odds, bye_odds, average_finishes
+
+
+def calculate_playoff_odds_loop(league, num_simulations=50000, std_dev=0.50):
+    """
+    Reference pure-Python version of calculate_playoff_odds.
+
+    Kept to check the vectorized engine against: both use the same model and
+    should agree up to Monte Carlo noise.
+    
     Parameters:
     - num_simulations: number of Monte Carlo simulations to run (default 10000)
     
@@ -30,6 +469,11 @@ def calculate_playoff_odds(schedule, teams, current_wins, num_simulations=50000,
     Each week, each team scores between 70% and 130% of league average.
     """
     
+    teams = league.teams
+    current_wins = league.current_wins()
+    schedule = league.remaining_schedule()
+    playoff_teams, bye_teams = league.playoff_teams, league.bye_teams
+
     # Calculate each team's average points per game
     # This allows teams to regress toward their own average, not league average
     team_avg_ppg = {}
@@ -100,8 +544,6 @@ def calculate_playoff_odds(schedule, teams, current_wins, num_simulations=50000,
                     bye_count[team] += 1
     
     # Calculate probabilities
-    for team in teams:
-        print(f"Playoff count {team}: {playoff_count[team]}")
     playoff_odds = {
         team: playoff_count[team] / num_simulations
         for team in teams
@@ -120,7 +562,7 @@ def calculate_playoff_odds(schedule, teams, current_wins, num_simulations=50000,
     return playoff_odds, bye_odds, average_finishes
 
 
-def print_playoff_odds_report(num_simulations=100000, playoff_odds=None, bye_odds=None, average_finishes=None):
+def print_playoff_odds_report(teams, num_simulations=100000, playoff_odds=None, bye_odds=None, average_finishes=None):
     """
     Print a formatted report of playoff odds for all teams.
     """
@@ -129,7 +571,7 @@ def print_playoff_odds_report(num_simulations=100000, playoff_odds=None, bye_odd
     print(f"PLAYOFF ODDS REPORT (Based on {num_simulations} simulations)")
     print(f"{'='*80}\n")
     
-    print(f"{'Team':<10} {'Player':<15} {'Playoff %':<15} {'Bye %':<15} {'Avg Finish':<15}")
+    print(f"{'Team':<25} {'Playoff %':<15} {'Bye %':<15} {'Avg Finish':<15}")
     print("-" * 80)
     
     # Sort by playoff odds (descending)
@@ -144,13 +586,17 @@ def print_playoff_odds_report(num_simulations=100000, playoff_odds=None, bye_odd
         bye_pct = bye_odds[team] * 100
         avg_finish = average_finishes[team]
         
-        print(f"{team:<10} {playoff_pct:>8.4f}%        {bye_pct:>6.1f}%        {avg_finish:>6.2f}")
+        print(f"{team:<25} {playoff_pct:>8.4f}%       {bye_pct:>6.1f}%         {avg_finish:>6.2f}")
     
     print(f"\n{'='*80}\n")
 
 def main():
-    playoff_odds, bye_odds, average_finishes = calculate_playoff_odds(num_simulations=100000, schedule=schedule, teams=teams, current_wins=current_wins)
-    print_playoff_odds_report(num_simulations=100000, playoff_odds=playoff_odds, bye_odds=bye_odds, average_finishes=average_finishes)
+    # Runs against the sample league in Fetchers/resources
+    league = fetch_csv()
+    if league is None:
+        return
+    playoff_odds, bye_odds, average_finishes = calculate_playoff_odds(league, num_simulations=100000)
+    print_playoff_odds_report(league.teams, num_simulations=100000, playoff_odds=playoff_odds, bye_odds=bye_odds, average_finishes=average_finishes)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,230 @@
+# Weekly league snapshots and playoff odds history
+# - Every refresh of a league saves its standings and remaining schedule as
+#   the snapshot of the week it was taken in, keyed by (source, league_id, season, week)
+# - A week's matchups are fetched once and kept, so later refreshes only
+#   download the standings and weeks they haven't seen
+# - Odds are saved with the fingerprint of the League they were simulated
+#   from; a refresh whose inputs haven't changed returns them without
+#   simulating, and the season's odds history is read straight from the table
+# - Configured from the environment:
+#   SEASON_STORE_DB (SQLite path, off by default)
+
+import json
+import os
+import time
+from datetime import datetime
+
+import metrics
+from cache import SQLiteFile
+from league import League
+from playoff_pred import calculate_playoff_odds
+from Simulators.result_cache import cached_call, league_fingerprint
+
+
+class SeasonStore(SQLiteFile):
+    """
+    SQLite tables of weekly matchups, league snapshots and odds per league season.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        with self._connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS season_matchups '
+                         '(source TEXT, league_id TEXT, season INTEGER, week INTEGER, matchups TEXT NOT NULL, '
+                         'PRIMARY KEY (source, league_id, season, week))')
+            conn.execute('CREATE TABLE IF NOT EXISTS season_snapshots '
+                         '(source TEXT, league_id TEXT, season INTEGER, week INTEGER, league TEXT NOT NULL, '
+                         'fingerprint TEXT NOT NULL, taken_at REAL NOT NULL, '
+                         'PRIMARY KEY (source, league_id, season, week))')
+            conn.execute('CREATE TABLE IF NOT EXISTS season_odds '
+                         '(source TEXT, league_id TEXT, season INTEGER, week INTEGER, settings TEXT, '
+                         'fingerprint TEXT NOT NULL, odds TEXT NOT NULL, computed_at REAL NOT NULL, '
+                         'PRIMARY KEY (source, league_id, season, week, settings))')
+
+    def matchups(self, source, league_id, season):
+        """
+        Return {week: [(home, away), ...]} of every stored week.
+        """
+        with self._connect() as conn:
+            rows = conn.execute('SELECT week, matchups FROM season_matchups '
+                                'WHERE source = ? AND league_id = ? AND season = ?',
+                                (source, str(league_id), season)).fetchall()
+        return {week: [tuple(game) for game in json.loads(matchups)] for week, matchups in rows}
+
+    def save_matchups(self, source, league_id, season, matchups):
+        with self._connect() as conn:
+            conn.executemany('INSERT OR REPLACE INTO season_matchups VALUES (?, ?, ?, ?, ?)',
+                             [(source, str(league_id), season, week, json.dumps(games))
+                              for week, games in matchups.items()])
+
+    def snapshot(self, source, league_id, season, week):
+        """
+        Return (League, fingerprint, taken_at) of a week, or None if it has no snapshot.
+        """
+        with self._connect() as conn:
+            row = conn.execute('SELECT league, fingerprint, taken_at FROM season_snapshots '
+                               'WHERE source = ? AND league_id = ? AND season = ? AND week = ?',
+                               (source, str(league_id), season, week)).fetchone()
+        if row is None:
+            return None
+        return League.from_dict(json.loads(row[0])), row[1], row[2]
+
+    def save_snapshot(self, source, league_id, season, week, league, fingerprint):
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO season_snapshots VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (source, str(league_id), season, week, json.dumps(league.to_dict()),
+                          fingerprint, time.time()))
+
+    def odds(self, source, league_id, season, week, settings):
+        """
+        Return (odds, fingerprint of the League they came from), or None.
+        """
+        with self._connect() as conn:
+            row = conn.execute('SELECT odds, fingerprint FROM season_odds '
+                               'WHERE source = ? AND league_id = ? AND season = ? AND week = ? AND settings = ?',
+                               (source, str(league_id), season, week, settings)).fetchone()
+        if row is None:
+            return None
+        return tuple(json.loads(row[0])), row[1]
+
+    def save_odds(self, source, league_id, season, week, settings, fingerprint, odds):
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO season_odds VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         (source, str(league_id), season, week, settings, fingerprint,
+                          json.dumps(odds), time.time()))
+
+    def history(self, source, league_id, season, settings):
+        """
+        Every week's odds under these settings, oldest first.
+
+        Returns a list of dicts of week, computed_at, taken_at and
+        current_wins (when the week's snapshot still holds the standings the
+        odds came from, else None), playoff_odds, bye_odds and average_finishes.
+        """
+        with self._connect() as conn:
+            rows = conn.execute('SELECT o.week, o.odds, o.computed_at, s.league, s.taken_at '
+                                'FROM season_odds o LEFT JOIN season_snapshots s '
+                                'ON s.source = o.source AND s.league_id = o.league_id '
+                                'AND s.season = o.season AND s.week = o.week AND s.fingerprint = o.fingerprint '
+                                'WHERE o.source = ? AND o.league_id = ? AND o.season = ? AND o.settings = ? '
+                                'ORDER BY o.week',
+                                (source, str(league_id), season, settings)).fetchall()
+        history = []
+        for week, odds, computed_at, league, taken_at in rows:
+            playoff_odds, bye_odds, average_finishes = json.loads(odds)
+            history.append({
+                'week': week,
+                'computed_at': computed_at,
+                'taken_at': taken_at,
+                'current_wins': League.from_dict(json.loads(league)).current_wins() if league else None,
+                'playoff_odds': playoff_odds,
+                'bye_odds': bye_odds,
+                'average_finishes': average_finishes,
+            })
+        return history
+
+
+def create_season_store():
+    db_path = os.environ.get('SEASON_STORE_DB')
+    return SeasonStore(db_path) if db_path else None
+
+
+season_store = create_season_store()
+
+
+def settings_key(num_simulations, std_dev, seed):
+    return league_fingerprint(num_simulations=num_simulations, std_dev=std_dev, seed=seed)
+
+
+def season_league(state, known):
+    """
+    League of a fetched SeasonState whose missing weeks are in `known`, or None.
+    """
+    if state is None:
+        return None
+    try:
+        return League.from_season(state, {**known, **state.matchups})
+    except (KeyError, ValueError) as e:
+        print(f"Error building league from season snapshot: {e}")
+        return None
+
+
+def refresh_league(source, league_id, fetch_season, season=None):
+    """
+    Fetch what changed since the last refresh and save this week's snapshot.
+
+    Only the standings and the matchups of weeks not stored yet are
+    downloaded. If stored matchups no longer fit the standings (a team was
+    renamed), every remaining week is fetched again.
+
+    Returns:
+    - dict of league, week, fingerprint, new_weeks (weeks whose matchups were
+      fetched) and changed (whether the snapshot differs from the week's
+      last one), or None if the fetch failed
+    """
+    season = season or datetime.now().year
+    known = season_store.matchups(source, league_id, season)
+    with metrics.span('fetch', source=source):
+        state = fetch_season(league_id, known.keys())
+        league = season_league(state, known)
+        if league is None and state is not None and known:
+            # Stored matchups name a team the standings no longer have
+            state = fetch_season(league_id, ())
+            league = season_league(state, {})
+    if league is None:
+        metrics.increment('fetch_failures_total', source=source)
+        return None
+    season_store.save_matchups(source, league_id, season, state.matchups)
+
+    fingerprint = league_fingerprint(league=league)
+    previous = season_store.snapshot(source, league_id, season, state.week)
+    changed = previous is None or previous[1] != fingerprint
+    if changed:
+        season_store.save_snapshot(source, league_id, season, state.week, league, fingerprint)
+    return {
+        'league': league,
+        'week': state.week,
+        'fingerprint': fingerprint,
+        'new_weeks': sorted(state.matchups),
+        'changed': changed,
+    }
+
+
+def track_league(source, league_id, fetch_season, num_simulations=50000, std_dev=0.50, seed=None,
+                 workers=1, season=None):
+    """
+    Refresh a league and return this week's playoff odds, simulating only if
+    the league changed since odds were last saved for these settings.
+
+    Returns:
+    - refresh_league's dict plus odds ((playoff_odds, bye_odds, average_finishes))
+      and odds_status ('reused' or 'simulated'), or None if the fetch failed
+    """
+    season = season or datetime.now().year
+    refresh = refresh_league(source, league_id, fetch_season, season)
+    if refresh is None:
+        return None
+
+    settings = settings_key(num_simulations, std_dev, seed)
+    stored = season_store.odds(source, league_id, season, refresh['week'], settings)
+    if stored is not None and stored[1] == refresh['fingerprint']:
+        metrics.increment('cache_requests_total', cache='season', status='hit')
+        return dict(refresh, odds=stored[0], odds_status='reused')
+
+    metrics.increment('cache_requests_total', cache='season', status='miss')
+    odds, _ = cached_call(calculate_playoff_odds,
+                          league=refresh['league'],
+                          num_simulations=num_simulations,
+                          std_dev=std_dev,
+                          seed=seed,
+                          workers=workers)
+    season_store.save_odds(source, league_id, season, refresh['week'], settings, refresh['fingerprint'], odds)
+    return dict(refresh, odds=odds, odds_status='simulated')
+
+
+def odds_history(source, league_id, num_simulations=50000, std_dev=0.50, seed=None, season=None):
+    """
+    The saved weekly odds of a league season under these settings; never fetches or simulates.
+    """
+    season = season or datetime.now().year
+    return season_store.history(source, league_id, season, settings_key(num_simulations, std_dev, seed))
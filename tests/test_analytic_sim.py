@@ -0,0 +1,19 @@
+# Checks of the closed-form fast mode against simulation
+
+from benchmarks.synthetic import synthetic_league
+from playoff_pred import calculate_playoff_odds, calculate_playoff_odds_analytic
+from Simulators.analytic_sim import ANALYTIC_ERROR_BOUND
+
+
+def test_within_error_bound():
+    # ANALYTIC_ERROR_BOUND is returned to clients as the fast mode's error_bound
+    for num_teams in (8, 12, 16):
+        for remaining_weeks in (1, 2, 4, 8):
+            league = synthetic_league(num_teams, remaining_weeks, seed=num_teams + remaining_weeks)
+            for std_dev in (0.3, 0.7):
+                analytic = calculate_playoff_odds_analytic(league, std_dev)
+                simulated = calculate_playoff_odds(league, 50000, std_dev, seed=0)
+                for analytic_odds, simulated_odds in zip(analytic[:2], simulated[:2]):
+                    for team in league.teams:
+                        error = abs(analytic_odds[team] - simulated_odds[team])
+                        assert error <= ANALYTIC_ERROR_BOUND, (num_teams, remaining_weeks, std_dev, team)
@@ -0,0 +1,21 @@
+# Checks of the packed batch engine
+
+from benchmarks.synthetic import synthetic_league
+from playoff_pred import calculate_playoff_odds, calculate_playoff_odds_batch
+
+
+def test_batch_matches_single_leagues():
+    # Mixed team counts and simulation counts, so several packs; the
+    # one-week league is enumerated exactly
+    leagues = [
+        {'league': synthetic_league(8, 4, seed=0), 'num_simulations': 20000, 'seed': 1},
+        {'league': synthetic_league(8, 3, seed=1), 'num_simulations': 20000, 'seed': 2, 'std_dev': 0.4},
+        {'league': synthetic_league(10, 5, seed=2), 'num_simulations': 20000, 'seed': 3},
+        {'league': synthetic_league(12, 6, seed=3), 'num_simulations': 30000, 'seed': 4},
+        {'league': synthetic_league(12, 4, seed=4), 'num_simulations': 30000, 'seed': 5},
+        {'league': synthetic_league(12, 1, seed=5), 'num_simulations': 20000, 'seed': 6},
+    ]
+    results = calculate_playoff_odds_batch(leagues)
+    for entry, (odds, error) in zip(leagues, results):
+        assert error is None
+        assert odds == calculate_playoff_odds(**entry)
@@ -0,0 +1,43 @@
+# Checks of the clinch pre-pass
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_league
+from league import League
+from Simulators.clinch import clinch_status
+from Simulators.monte_carlo import build_sim_inputs, rank_batch, simulate_batch
+
+
+def test_block_ranking_matches_full_ranking():
+    # Late-season leagues, where the pre-pass splits the standings into blocks
+    split = 0
+    rng = np.random.default_rng(0)
+    for num_teams in (8, 10, 12, 14):
+        for remaining_weeks in (1, 2):
+            for seed in range(10):
+                inputs = build_sim_inputs(synthetic_league(num_teams, remaining_weeks, seed), 0.5)
+                split += len(inputs.blocks) > 1
+                wins, points = simulate_batch(inputs, rng, 1000)
+                assert np.array_equal(rank_batch(wins, points, inputs.blocks), rank_batch(wins, points))
+    assert split > 0
+
+
+def test_clinched_and_eliminated_teams():
+    # One week left: A can't drop below first and D can't climb above last
+    current_wins = {
+        'A': (10, 0, 0, 1300.0),
+        'B': (5, 5, 0, 1100.0),
+        'C': (5, 5, 0, 1050.0),
+        'D': (0, 10, 0, 900.0),
+    }
+    league = League.from_records(current_wins, [('A', 'D'), ('B', 'C')], list(current_wins),
+                                 playoff_teams=2, bye_teams=1)
+    status = clinch_status(build_sim_inputs(league, 0.5), league.playoff_teams, league.bye_teams)
+
+    assert status['A'] == {'best_finish': 1, 'worst_finish': 1, 'clinched_playoffs': True,
+                           'eliminated': False, 'clinched_bye': True, 'eliminated_from_bye': False}
+    assert status['D'] == {'best_finish': 4, 'worst_finish': 4, 'clinched_playoffs': False,
+                           'eliminated': True, 'clinched_bye': False, 'eliminated_from_bye': True}
+    for team in ('B', 'C'):
+        assert status[team]['best_finish'] == 2 and status[team]['worst_finish'] == 3
+        assert not status[team]['clinched_playoffs'] and not status[team]['eliminated']
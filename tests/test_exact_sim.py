@@ -0,0 +1,50 @@
+# Checks of the exact enumeration engine against Monte Carlo
+
+import math
+
+from benchmarks.synthetic import synthetic_league
+from playoff_pred import calculate_playoff_odds
+from Simulators.exact_sim import MIN_SIMULATIONS_PER_OUTCOME, count_outcomes, use_exact, weighted_positions
+from Simulators.monte_carlo import build_sim_inputs
+
+EXACT_SIMULATIONS = 50000
+MONTE_CARLO_SIMULATIONS = 400000
+STANDARD_ERRORS = 4
+
+
+def test_matches_monte_carlo_on_bubble_league():
+    # One week left in a 14-team league: every game is head to head between
+    # teams level on wins, so the tiebreaker has to see that the winner of a
+    # game also outscored the loser in it
+    league = synthetic_league(14, 1, seed=1)
+    assert use_exact(build_sim_inputs(league, 0.5), EXACT_SIMULATIONS)
+    exact = calculate_playoff_odds(league, EXACT_SIMULATIONS, std_dev=0.5, seed=0)
+    simulated = calculate_playoff_odds(league, MONTE_CARLO_SIMULATIONS, std_dev=0.5, seed=0, exact_threshold=0)
+
+    for exact_odds, simulated_odds in zip(exact[:2], simulated[:2]):
+        for team in league.teams:
+            p = simulated_odds[team]
+            # The exact engine samples the tiebreaker over as many rows, and
+            # is never noisier than simulating them
+            se = math.sqrt(p * (1 - p) * (1 / MONTE_CARLO_SIMULATIONS + 1 / EXACT_SIMULATIONS))
+            assert abs(exact_odds[team] - p) <= STANDARD_ERRORS * se + 1e-9, team
+
+
+def test_small_runs_are_simulated():
+    # Below MIN_SIMULATIONS_PER_OUTCOME simulations per outcome, enumerating
+    # would cost more than the run, so the run is simulated as asked
+    league = synthetic_league(12, 1, seed=0)
+    outcomes = count_outcomes(build_sim_inputs(league))
+    num_simulations = outcomes * MIN_SIMULATIONS_PER_OUTCOME - 1
+    assert not use_exact(build_sim_inputs(league), num_simulations)
+    assert (calculate_playoff_odds(league, num_simulations, seed=0)
+            == calculate_playoff_odds(league, num_simulations, seed=0, exact_threshold=0))
+
+
+def test_ranks_no_more_rows_than_the_run_it_replaces():
+    # A row costs the same to rank as a simulation, so this bounds the
+    # exact engine's cost by the Monte Carlo run's, plus one row per outcome
+    for args in ((12, 1, 0), (8, 2, 0), (10, 2, 3)):
+        inputs = build_sim_inputs(synthetic_league(*args), 0.5)
+        ranked = sum(len(weights) for weights, _ in weighted_positions(inputs, 0, EXACT_SIMULATIONS))
+        assert ranked <= EXACT_SIMULATIONS + count_outcomes(inputs), args
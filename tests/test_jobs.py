@@ -0,0 +1,44 @@
+# Checks of the background job manager
+
+import threading
+
+from jobs import JobManager
+
+
+def blocking_run(started, release):
+    def run(job):
+        started.set()
+        while not release.wait(0.01):
+            job.report(0, 1, ({}, {}, {}))
+        return 'done'
+    return run
+
+
+def test_shared_job_runs_until_every_client_cancels():
+    manager = JobManager(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    first, created = manager.submit('key', blocking_run(started, release))
+    second, second_created = manager.submit('key', blocking_run(started, release))
+    assert created and not second_created and second is first
+    started.wait(5)
+
+    manager.cancel(first.id)
+    assert not first.cancel_event.is_set() and first.status == 'running'
+
+    manager.cancel(first.id)
+    first.future.result(timeout=5)
+    assert first.status == 'cancelled'
+
+
+def test_cancelled_job_is_not_shared():
+    manager = JobManager(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    job, _ = manager.submit('key', blocking_run(started, release))
+    started.wait(5)
+    manager.cancel(job.id)
+
+    release.set()
+    replacement, created = manager.submit('key', lambda job: 'again')
+    assert created and replacement is not job
+    assert replacement.future.result(timeout=5) is None
+    assert replacement.status == 'done' and replacement.result == 'again'
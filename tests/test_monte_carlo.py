@@ -0,0 +1,47 @@
+# Checks of the vectorized Monte Carlo engine
+# - calculate_playoff_odds agrees with the reference loop on the bundled league
+# - A seeded run gives the same odds for any number of workers
+
+import math
+import random
+
+import Simulators.parallel_sim as parallel_sim
+from Fetchers.csv_fetch import fetch_csv
+from playoff_pred import calculate_playoff_odds, calculate_playoff_odds_loop
+
+LOOP_SIMULATIONS = 20000
+VECTORIZED_SIMULATIONS = 50000
+STANDARD_ERRORS = 4
+
+
+def assert_probability_close(loop, vectorized, team):
+    # Standard error of the difference of two independent estimates, from
+    # their pooled probability
+    p = (loop * LOOP_SIMULATIONS + vectorized * VECTORIZED_SIMULATIONS) / (LOOP_SIMULATIONS + VECTORIZED_SIMULATIONS)
+    se = math.sqrt(p * (1 - p) * (1 / LOOP_SIMULATIONS + 1 / VECTORIZED_SIMULATIONS))
+    assert abs(loop - vectorized) <= STANDARD_ERRORS * se, team
+
+
+def test_matches_reference_loop():
+    league = fetch_csv()
+    random.seed(0)
+    loop_playoff, loop_bye, loop_finish = calculate_playoff_odds_loop(league, LOOP_SIMULATIONS)
+    # exact_threshold=0 keeps the run on the Monte Carlo engine
+    playoff, bye, finish = calculate_playoff_odds(league, VECTORIZED_SIMULATIONS, seed=1, exact_threshold=0)
+
+    # Finishing positions are at most (teams - 1) / 2 from their mean
+    finish_sd = (len(league.teams) - 1) / 2
+    finish_tolerance = STANDARD_ERRORS * finish_sd * math.sqrt(1 / LOOP_SIMULATIONS + 1 / VECTORIZED_SIMULATIONS)
+    for team in league.teams:
+        assert_probability_close(loop_playoff[team], playoff[team], team)
+        assert_probability_close(loop_bye[team], bye[team], team)
+        assert abs(finish[team] - loop_finish[team]) <= finish_tolerance, team
+
+
+def test_seeded_runs_match_across_workers(monkeypatch):
+    # Allow a second worker even on a single-core machine
+    monkeypatch.setattr(parallel_sim, 'MAX_WORKERS', 2)
+    league = fetch_csv()
+    serial = calculate_playoff_odds(league, 20000, seed=7, workers=1, exact_threshold=0)
+    parallel = calculate_playoff_odds(league, 20000, seed=7, workers=2, exact_threshold=0)
+    assert serial == parallel
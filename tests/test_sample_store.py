@@ -0,0 +1,29 @@
+# Checks of the persistent score matrix store
+
+import os
+
+import Simulators.sample_store as sample_store
+from benchmarks.synthetic import synthetic_league
+from playoff_pred import calculate_playoff_odds, iter_playoff_odds
+
+
+def test_stored_runs_match_fresh_runs(monkeypatch, tmp_path):
+    league = synthetic_league(10, 5, seed=0)
+    fresh = calculate_playoff_odds(league, 20000, seed=3)
+
+    monkeypatch.setattr(sample_store, 'sample_store', sample_store.SampleStore(str(tmp_path), max_bytes=2 ** 30))
+    miss = calculate_playoff_odds(league, 20000, seed=3)
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.npy')]
+    hit = calculate_playoff_odds(league, 20000, seed=3)
+
+    assert miss == fresh
+    assert hit == fresh
+
+
+def test_closing_a_run_early_leaves_no_files(monkeypatch, tmp_path):
+    league = synthetic_league(10, 5, seed=0)
+    monkeypatch.setattr(sample_store, 'sample_store', sample_store.SampleStore(str(tmp_path), max_bytes=2 ** 30))
+    snapshots = iter_playoff_odds(league, 50000, seed=3)
+    next(snapshots)
+    snapshots.close()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,31 @@
+# Checks of the Sleeper fetcher against the recorded fixtures, served locally
+
+import time
+
+import pytest
+
+import Fetchers.sleeper_fetch as sleeper_fetch
+from benchmarks.fixtures import FIXTURE_LEAGUE_ID, FIXTURE_REMAINING_WEEKS, FIXTURE_TEAMS, FixtureServer
+from benchmarks.synthetic import standings, synthetic_season
+
+LATENCY = 0.2
+
+
+def test_fetch_matches_fixtures_in_two_round_trips(monkeypatch):
+    teams, weeks, scores = synthetic_season(FIXTURE_TEAMS, FIXTURE_REMAINING_WEEKS)
+    with FixtureServer(latency=LATENCY) as server:
+        monkeypatch.setattr(sleeper_fetch, 'SLEEPER_API_URL', server.url('sleeper'))
+        start = time.perf_counter()
+        league = sleeper_fetch.fetch_sleeper_playoff_odds_data(FIXTURE_LEAGUE_ID)
+        elapsed = time.perf_counter() - start
+
+    assert league is not None
+    assert league.teams == teams
+    # Sleeper splits points into whole points and hundredths
+    assert league.current_wins() == {team: pytest.approx(record)
+                                     for team, record in standings(teams, weeks, scores).items()}
+    assert league.remaining_schedule() == [game for week in weeks[len(scores):] for game in week]
+
+    # Users, rosters and settings in one round trip, every remaining week's
+    # matchups in a second; one request at a time would take 3 + weeks
+    assert 2 * LATENCY <= elapsed < 3 * LATENCY
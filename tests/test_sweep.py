@@ -0,0 +1,39 @@
+# Checks of the std_dev and playoff cutoff sweep
+
+import pytest
+
+from benchmarks.synthetic import synthetic_league
+from league import League
+from playoff_pred import calculate_playoff_odds, calculate_playoff_odds_sweep
+
+STD_DEVS = [0.3, 0.5]
+PLAYOFF_TEAMS = [4, 6]
+BYE_TEAMS = [1, 2]
+
+
+def with_cutoffs(league, playoff_teams, bye_teams):
+    return League(league.teams, league.wins, league.losses, league.ties, league.points, league.schedule,
+                  playoff_teams, bye_teams)
+
+
+def assert_grid_matches(league, num_simulations, approx=lambda value: value):
+    playoff_odds, bye_odds, average_finishes = calculate_playoff_odds_sweep(
+        league, STD_DEVS, PLAYOFF_TEAMS, BYE_TEAMS, num_simulations=num_simulations, seed=3)
+    for s, std_dev in enumerate(STD_DEVS):
+        for c, (playoff_teams, bye_teams) in enumerate(zip(PLAYOFF_TEAMS, BYE_TEAMS)):
+            single = calculate_playoff_odds(with_cutoffs(league, playoff_teams, bye_teams), num_simulations,
+                                            std_dev=std_dev, seed=3)
+            for team in league.teams:
+                assert playoff_odds[team][s][c] == approx(single[0][team])
+                assert bye_odds[team][s][c] == approx(single[1][team])
+                assert average_finishes[team][s] == approx(single[2][team])
+
+
+def test_simulated_grid_points_match_single_runs():
+    # Common random numbers: every grid point is bit for bit the run it stands for
+    assert_grid_matches(synthetic_league(10, 5, seed=0), 20000)
+
+
+def test_exact_grid_points_match_single_runs():
+    # Same samples, summed in a different order
+    assert_grid_matches(synthetic_league(10, 1, seed=0), 20000, approx=lambda value: pytest.approx(value, rel=1e-12, abs=1e-12))